@@ -0,0 +1,44 @@
+import random
+from timeit import timeit
+
+from accent_analyser.core.rule_detection import df_to_data, df_to_data_columnar
+from pandas import DataFrame
+
+WORDS = [
+  ("the", "ðə", "də"),
+  ("the", "ðə", "ðə"),
+  ("cat", "kæt", "kæt"),
+  ("think", "θɪŋk", "sɪŋk"),
+  ("this", "ðɪs", "dɪs"),
+  ("with", "wɪθ", "wɪt"),
+  ("world", "wɝld", "wɔld"),
+  ("three", "θɹi", "tɹi"),
+]
+
+
+def get_random_df(n_rows: int, n_distinct: int, seed: int = 1234) -> DataFrame:
+  rnd = random.Random(seed)
+  vocabulary = []
+  for i in range(n_distinct):
+    graphemes, phonemes, phones = rnd.choice(WORDS)
+    vocabulary.append((f"{graphemes}{i}", f"{phonemes}{i}", f"{phones}{i}", "eng"))
+  data = rnd.choices(vocabulary, k=n_rows)
+  res = DataFrame(data=data, columns=["graphemes", "phonemes", "phones", "lang"])
+  return res
+
+
+def main(n_rows: int = 100000, n_distinct: int = 5000, repeat: int = 3) -> None:
+  df = get_random_df(n_rows, n_distinct)
+  assert df_to_data_columnar(df) == df_to_data(df)
+
+  duration_rows = timeit(lambda: df_to_data(df), number=repeat) / repeat
+  duration_columnar = timeit(lambda: df_to_data_columnar(df), number=repeat) / repeat
+
+  print(f"Rows: {n_rows}, distinct words: {n_distinct}")
+  print(f"df_to_data:          {duration_rows:.3f}s")
+  print(f"df_to_data_columnar: {duration_columnar:.3f}s")
+  print(f"Speedup:             {duration_rows / duration_columnar:.1f}x")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,58 @@
+import random
+from difflib import ndiff
+from timeit import timeit
+
+from accent_analyser.core.alignment import get_diff_lines
+from accent_analyser.core.rule_detection import get_changes
+
+SYMBOLS = ["p", "b", "t", "d", "k", "s", "z", "θ", "ð", "ə", "ɪ", "i", "aɪ", "eɪ", "ˈ", "ɹ", "l", "w"]
+
+
+def get_random_pairs(n_pairs: int, seed: int = 1234):
+  rnd = random.Random(seed)
+  res = []
+  for _ in range(n_pairs):
+    phonemes = rnd.choices(SYMBOLS, k=rnd.randint(2, 10))
+    phones = list(phonemes)
+    for _ in range(rnd.randint(0, 2)):
+      pos = rnd.randrange(len(phones))
+      operation = rnd.randint(0, 2)
+      if operation == 0:
+        phones[pos] = rnd.choice(SYMBOLS)
+      elif operation == 1:
+        phones.insert(pos, rnd.choice(SYMBOLS))
+      elif len(phones) > 1:
+        phones.pop(pos)
+    res.append((tuple(phonemes), tuple(phones)))
+  return res
+
+
+def get_changes_ndiff(l1, l2):
+  result = {}
+  for change_pos, change in enumerate(ndiff(l1, l2)):
+    if change[:2] != "  ":
+      result[change_pos] = (change[2:], change[:2])
+  return result
+
+
+def main(n_pairs: int = 20000, repeat: int = 3) -> None:
+  pairs = get_random_pairs(n_pairs)
+  for phonemes, phones in pairs:
+    assert get_diff_lines(phonemes, phones) == [(x[:2], x[2:]) for x in ndiff(phonemes, phones)]
+
+  duration_ndiff = timeit(lambda: [list(ndiff(a, b)) for a, b in pairs], number=repeat) / repeat
+  duration_engine = timeit(lambda: [get_diff_lines(a, b) for a, b in pairs], number=repeat) / repeat
+  duration_changes_ndiff = timeit(
+    lambda: [get_changes_ndiff(a, b) for a, b in pairs], number=repeat) / repeat
+  duration_changes = timeit(lambda: [get_changes(a, b) for a, b in pairs], number=repeat) / repeat
+
+  print(f"Pairs: {n_pairs}")
+  print(f"ndiff:                 {duration_ndiff / n_pairs * 1e6:.2f}us per pair")
+  print(f"get_diff_lines:        {duration_engine / n_pairs * 1e6:.2f}us per pair")
+  print(f"Speedup:               {duration_ndiff / duration_engine:.1f}x")
+  print(f"get_changes via ndiff: {duration_changes_ndiff / n_pairs * 1e6:.2f}us per pair")
+  print(f"get_changes:           {duration_changes / n_pairs * 1e6:.2f}us per pair")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,36 @@
+import random
+from timeit import timeit
+
+from accent_analyser.core.probability_sampler import ProbabilitySampler
+from accent_analyser.core.word_probabilities import replace_with_prob
+
+
+def get_random_probabilities(n_keys: int, seed: int = 1234):
+  rnd = random.Random(seed)
+  res = {}
+  for key_nr in range(n_keys):
+    res[(f"p{key_nr}",)] = [
+      ((f"p{key_nr}", str(entry_nr)), rnd.randint(1, 100)) for entry_nr in range(rnd.randint(1, 5))
+    ]
+  return res
+
+
+def main(n_keys: int = 2000, n_draws: int = 200000, repeat: int = 3) -> None:
+  probabilities = get_random_probabilities(n_keys)
+  rnd = random.Random(1234)
+  keys = list(probabilities)
+  symbols = [rnd.choice(keys) for _ in range(n_draws)]
+  sampler = ProbabilitySampler(probabilities, seed=1234)
+
+  duration_old = timeit(lambda: [replace_with_prob(x, probabilities) for x in symbols], number=repeat) / repeat
+  duration_sample = timeit(lambda: [sampler.sample(x) for x in symbols], number=repeat) / repeat
+  duration_sample_many = timeit(lambda: sampler.sample_many(symbols), number=repeat) / repeat
+
+  print(f"Draws: {n_draws}")
+  print(f"replace_with_prob: {duration_old / n_draws * 1e9:.0f}ns per draw")
+  print(f"sample:            {duration_sample / n_draws * 1e9:.0f}ns per draw ({duration_old / duration_sample:.1f}x)")
+  print(f"sample_many:       {duration_sample_many / n_draws * 1e9:.0f}ns per draw ({duration_old / duration_sample_many:.1f}x)")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,48 @@
+import random
+from timeit import timeit
+
+from accent_analyser.core.rule_set import RewriteRule, RuleSet
+
+SYMBOLS = ["p", "b", "t", "d", "k", "s", "z", "θ", "ð", "ə", "ɪ", "i", "aɪ", "eɪ", "ˈ", "ɹ", "l", "w", "v", "ʒ"]
+
+
+def get_random_rules(n_rules: int, seed: int = 1234):
+  rnd = random.Random(seed)
+  res = []
+  for _ in range(n_rules):
+    from_symbols = tuple(rnd.choices(SYMBOLS, k=rnd.randint(1, 3)))
+    to_symbols = tuple(rnd.choices(SYMBOLS, k=rnd.randint(0, 2)))
+    res.append(RewriteRule(from_symbols=from_symbols, to_symbols=to_symbols))
+  return res
+
+
+def get_random_words(n_words: int, seed: int = 1234):
+  rnd = random.Random(seed)
+  res = [tuple(rnd.choices(SYMBOLS, k=rnd.randint(2, 10))) for _ in range(n_words)]
+  return res
+
+
+def apply_per_rule(word: str, rules) -> str:
+  '''Like the rules in old/: one str.replace pass per rule.'''
+  for from_str, to_str in rules:
+    word = word.replace(from_str, to_str)
+  return word
+
+
+def main(n_words: int = 20000, repeat: int = 3) -> None:
+  words = get_random_words(n_words)
+  words_str = ["".join(word) for word in words]
+  print(f"Words: {n_words}")
+  for n_rules in [4, 50, 500]:
+    rules = get_random_rules(n_rules)
+    rules_str = [("".join(rule.from_symbols), "".join(rule.to_symbols)) for rule in rules]
+    rule_set = RuleSet(rules)
+    duration_old = timeit(lambda: [apply_per_rule(word, rules_str)
+                          for word in words_str], number=repeat) / repeat
+    duration_rule_set = timeit(lambda: [rule_set.apply(word) for word in words], number=repeat) / repeat
+    print(f"{n_rules:>4} rules: str.replace per rule {duration_old / n_words * 1e6:6.2f}us, "
+          f"RuleSet {duration_rule_set / n_words * 1e6:6.2f}us per word")
+
+
+if __name__ == "__main__":
+  main()
@@ -1,4 +1,4 @@
 from accent_analyser.app import load_probabilities
-from accent_analyser.core import (ProbabilitiesDict, Symbols,
-                                  check_probabilities_are_valid,
+from accent_analyser.core import (ProbabilitiesDict, ProbabilitySampler,
+                                  Symbols, check_probabilities_are_valid,
                                   replace_with_prob)
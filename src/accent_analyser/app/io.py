@@ -0,0 +1,237 @@
+import csv
+import gc
+import json
+import os
+import pickle
+from contextlib import nullcontext
+from itertools import islice
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from accent_analyser.core.instrumentation import (PROFILE_COLUMNS,
+                                                   get_profile_rows,
+                                                   instrumented)
+from accent_analyser.core.occurrences import Occurrences
+from accent_analyser.core.rule_detection import (RULE_DETECTION_VERSION,
+                                                 WordEntry,
+                                                 df_to_data_columnar)
+from accent_analyser.core.rules_store import RulesStore
+from accent_analyser.core.symbol_table import SymbolTable
+from accent_analyser.core.word_probabilities import ProbabilitiesDict
+
+DEFAULT_CHUNKSIZE = 100000
+INPUT_COLUMNS = ["graphemes", "phonemes", "phones", "lang"]
+
+PROBABILITIES_CACHE_FORMAT_VERSION = 1
+PROBABILITIES_CACHE_SUFFIX = ".cache"
+
+TSV = "tsv"
+PARQUET = "parquet"
+ARROW = "arrow"
+FILE_FORMATS = [TSV, PARQUET, ARROW]
+FILE_SUFFIXES = {TSV: ".csv", PARQUET: ".parquet", ARROW: ".arrow"}
+ARROW_SUFFIXES = {".parquet": PARQUET, ".arrow": ARROW, ".feather": ARROW, ".ipc": ARROW}
+DEFAULT_WRITE_BUFFER_SIZE = 10000
+DEFAULT_FLOAT_FORMAT = "{:.2f}"
+PROFILE_NAME = "profile"
+
+Columns = List[Tuple[str, type]]
+
+
+def get_file_format(path: Path) -> str:
+  '''Parquet and Arrow IPC files are recognized by their suffix; all other files are read as TSV.'''
+  return ARROW_SUFFIXES.get(path.suffix.lower(), TSV)
+
+
+def get_output_path(directory: Path, name: str, file_format: str) -> Path:
+  return directory / f"{name}{FILE_SUFFIXES[file_format]}"
+
+
+def read_words_chunked(path: Path, chunksize: int = DEFAULT_CHUNKSIZE, symbol_table: Optional[SymbolTable] = None) -> Iterator[List[WordEntry]]:
+  assert chunksize > 0
+  file_format = get_file_format(path)
+  if file_format == TSV:
+    with pd.read_csv(path, sep="\t", na_filter=False, usecols=INPUT_COLUMNS, dtype=str, chunksize=chunksize) as reader:
+      for chunk_df in reader:
+        words = df_to_data_columnar(chunk_df, symbol_table)
+        yield words
+  else:
+    for chunk_df in read_arrow_chunked(path, INPUT_COLUMNS, chunksize, file_format):
+      words = df_to_data_columnar(chunk_df, symbol_table)
+      yield words
+
+
+def read_arrow_chunked(path: Path, columns: List[str], chunksize: int, file_format: str) -> Iterator[pd.DataFrame]:
+  '''Reads only the given columns. Parquet files are streamed row group by row group; Arrow IPC files are memory-mapped. Missing values become empty strings like with na_filter=False. Requires pyarrow.'''
+  import pyarrow as pa
+  import pyarrow.ipc
+  import pyarrow.parquet as pq
+  if file_format == PARQUET:
+    batches = pq.ParquetFile(str(path)).iter_batches(batch_size=chunksize, columns=columns)
+    for batch in batches:
+      yield batch.to_pandas().fillna("")
+  else:
+    assert file_format == ARROW
+    with pa.memory_map(str(path)) as source:
+      table = pa.ipc.open_file(source).read_all().select(columns)
+      for batch in table.to_batches(max_chunksize=chunksize):
+        yield batch.to_pandas().fillna("")
+
+
+def read_df(path: Path) -> pd.DataFrame:
+  file_format = get_file_format(path)
+  if file_format == PARQUET:
+    return pd.read_parquet(path)
+  if file_format == ARROW:
+    return pd.read_feather(path)
+  return pd.read_csv(path, sep="\t")
+
+
+@instrumented("writing")
+def write_df(path: Path, df: pd.DataFrame, file_format: str = TSV) -> None:
+  '''Arrow IPC files are written in the Feather V2 format, which is the Arrow IPC file format. Parquet and Arrow require pyarrow.'''
+  assert file_format in FILE_FORMATS
+  if file_format == PARQUET:
+    df.to_parquet(path, index=False)
+  elif file_format == ARROW:
+    df.to_feather(path)
+  else:
+    df.to_csv(path, sep="\t", header=True, index=False)
+
+
+@instrumented("counting")
+def count_words(paths: List[Path], chunksize: int = DEFAULT_CHUNKSIZE) -> Occurrences:
+  occurrences = Occurrences()
+  symbol_table = SymbolTable()
+  for path in paths:
+    for words in read_words_chunked(path, chunksize, symbol_table):
+      occurrences.add(words)
+  return occurrences
+
+
+def open_rules_store(rules_store_path: Optional[Path]):
+  '''Context manager of the rules store at rules_store_path or of None without a path; the store is closed on exit, also after errors.'''
+  if rules_store_path is None:
+    return nullcontext()
+  return RulesStore(rules_store_path, RULE_DETECTION_VERSION)
+
+
+def get_probabilities_cache_path(path: Path) -> Path:
+  return path.with_name(path.name + PROBABILITIES_CACHE_SUFFIX)
+
+
+def get_source_signature(path: Path) -> Tuple[int, int, int]:
+  stat = path.stat()
+  return (PROBABILITIES_CACHE_FORMAT_VERSION, stat.st_size, stat.st_mtime_ns)
+
+
+def read_probabilities_cache(path: Path) -> Optional[ProbabilitiesDict]:
+  '''Returns the cached probabilities of the probabilities file at path (any format read_df reads) if the cache was written for its current size and modification time. Returns None if there is no such cache or it cannot be read, so that it is rebuilt.'''
+  logger = getLogger(__name__)
+  cache_path = get_probabilities_cache_path(path)
+  if not cache_path.exists():
+    return None
+  try:
+    with cache_path.open(mode="rb") as file:
+      if pickle.load(file) != get_source_signature(path):
+        return None
+      # the collector would traverse the many new tuples repeatedly
+      gc_was_enabled = gc.isenabled()
+      gc.disable()
+      try:
+        res = pickle.load(file)
+      finally:
+        if gc_was_enabled:
+          gc.enable()
+  except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, TypeError, ValueError) as error:
+    logger.warning(f"Probabilities cache {cache_path} could not be read and is rebuilt: {error!r}")
+    return None
+  return res
+
+
+def write_probabilities_cache(path: Path, probabilities: ProbabilitiesDict) -> None:
+  cache_path = get_probabilities_cache_path(path)
+  tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+  with tmp_path.open(mode="wb") as file:
+    pickle.dump(get_source_signature(path), file, protocol=5)
+    pickle.dump(probabilities, file, protocol=5)
+  # replace is atomic, so concurrently started workers never read a partial cache
+  tmp_path.replace(cache_path)
+
+
+def iter_batches(rows: Iterable[Tuple[Any, ...]], batch_size: int) -> Iterator[List[Tuple[Any, ...]]]:
+  rows = iter(rows)
+  return iter(lambda: list(islice(rows, batch_size)), [])
+
+
+@instrumented("writing")
+def write_rows(path: Path, columns: Columns, rows: Iterable[Tuple[Any, ...]], file_format: str = TSV, buffer_size: int = DEFAULT_WRITE_BUFFER_SIZE, float_format: str = DEFAULT_FLOAT_FORMAT) -> None:
+  '''Writes the rows in the given order while at most buffer_size of them are held in memory. Columns are (name, type) pairs; float columns are formatted with float_format only in TSV files and stay numeric in Parquet and Arrow files.'''
+  assert file_format in FILE_FORMATS
+  assert buffer_size > 0
+  if file_format == TSV:
+    write_rows_tsv(path, columns, rows, buffer_size, float_format)
+  else:
+    write_rows_arrow(path, columns, rows, buffer_size, file_format)
+
+
+def write_rows_tsv(path: Path, columns: Columns, rows: Iterable[Tuple[Any, ...]], buffer_size: int, float_format: str) -> None:
+  float_indices = [i for i, (_, column_type) in enumerate(columns) if column_type is float]
+  with path.open(mode="w", encoding="utf-8", newline="") as file:
+    # same dialect as DataFrame.to_csv(sep="\t")
+    writer = csv.writer(file, delimiter="\t", lineterminator="\n")
+    writer.writerow([name for name, _ in columns])
+    for batch in iter_batches(rows, buffer_size):
+      if len(float_indices) > 0:
+        batch = [list(row) for row in batch]
+        for row in batch:
+          for i in float_indices:
+            row[i] = float_format.format(row[i])
+      writer.writerows(batch)
+
+
+def get_arrow_schema(columns: Columns):
+  import pyarrow as pa
+  arrow_types = {int: pa.int64(), float: pa.float64(), str: pa.string()}
+  res = pa.schema([(name, arrow_types[column_type]) for name, column_type in columns])
+  return res
+
+
+def write_rows_arrow(path: Path, columns: Columns, rows: Iterable[Tuple[Any, ...]], buffer_size: int, file_format: str) -> None:
+  '''Every buffered batch becomes one Parquet row group or one Arrow IPC record batch. Requires pyarrow.'''
+  import pyarrow as pa
+  import pyarrow.ipc
+  import pyarrow.parquet as pq
+  schema = get_arrow_schema(columns)
+  if file_format == PARQUET:
+    writer = pq.ParquetWriter(str(path), schema)
+  else:
+    assert file_format == ARROW
+    writer = pa.ipc.new_file(str(path), schema)
+  with writer:
+    for batch in iter_batches(rows, buffer_size):
+      arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+      writer.write_batch(pa.record_batch(arrays, schema=schema))
+
+
+def write_profile(directory: Path) -> Tuple[Path, Path]:
+  '''Writes the recorded stages to profile.json and profile.csv (TSV) in directory.'''
+  rows = get_profile_rows()
+  json_path = directory / f"{PROFILE_NAME}.json"
+  data = {
+    name: {
+      "calls": calls,
+      "wall_time_s": wall_time,
+      "peak_rss_delta_bytes": peak_rss_delta,
+      "traced_peak_bytes": traced_peak,
+    }
+    for name, calls, wall_time, peak_rss_delta, traced_peak in rows
+  }
+  with json_path.open(mode="w", encoding="utf-8") as file:
+    json.dump(data, file, indent=2)
+
+  tsv_path = get_output_path(directory, PROFILE_NAME, TSV)
+  write_rows_tsv(tsv_path, PROFILE_COLUMNS, rows, DEFAULT_WRITE_BUFFER_SIZE, "{:.6f}")
+  return json_path, tsv_path
@@ -1,63 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger, getLogger
 from pathlib import Path
-from typing import Dict, List, Tuple
+from time import perf_counter
+from typing import Dict, List, Optional
+from typing import OrderedDict as OrderedDictType
 
-import pandas as pd
-from accent_analyser.core.rule_detection import (df_to_data,
-                                                 get_phone_occurrences,
-                                                 get_phoneme_occurrences,
+from accent_analyser.app.io import (TSV, count_words, get_output_path,
+                                    open_rules_store, read_df,
+                                    read_probabilities_cache, write_df,
+                                    write_probabilities_cache, write_profile,
+                                    write_rows)
+from accent_analyser.core.instrumentation import (disable, enable,
+                                                   instrumented, is_enabled,
+                                                   is_requested_by_env, reset)
+from accent_analyser.core.occurrences import Occurrences
+from accent_analyser.core.rule_detection import (RulesCache, WordEntry,
+                                                 WordRules,
                                                  get_rules_from_words)
-from accent_analyser.core.rule_stats import get_rule_stats, rule_stats_to_df
+from accent_analyser.core.rule_stats import RULE_STATS_COLUMNS, iter_rule_stats
 from accent_analyser.core.word_probabilities import (ProbabilitiesDict,
-                                                     get_probabilities,
-                                                     parse_probabilities_df,
-                                                     probabilities_to_df)
-from accent_analyser.core.word_stats import get_word_stats, word_stats_to_df
+                                                     get_probabilities_df,
+                                                     parse_probabilities_df)
+from accent_analyser.core.word_stats import WORD_STATS_COLUMNS, iter_word_stats
+from ordered_set import OrderedSet
 
 
-def load_probabilities(path: Path) -> ProbabilitiesDict:
-  df = pd.read_csv(path, sep="\t")
+def load_probabilities(path: Path, use_cache: bool = True) -> ProbabilitiesDict:
+  '''With use_cache the parsed probabilities are stored in a binary file next to path and reused as long as path is unchanged.'''
+  logger = getLogger(__name__)
+  if use_cache:
+    res = read_probabilities_cache(path)
+    if res is not None:
+      return res
+
+  df = read_df(path)
   res = parse_probabilities_df(df)
+
+  if use_cache:
+    try:
+      write_probabilities_cache(path, res)
+    except OSError as error:
+      logger.warning(f"Probabilities cache could not be written: {error}")
   return res
 
 
-def print_info(paths: List[Path]):
+def print_info(paths: List[Path], rules_store_path: Optional[Path] = None, n_jobs: int = 1, file_format: str = TSV):
+  write_reports(paths, Path("out"), rules_store_path, n_jobs, file_format)
+
+
+def write_reports(paths: List[Path], output_dir: Path, rules_store_path: Optional[Path] = None, n_jobs: int = 1, file_format: str = TSV, profile: bool = False) -> None:
+  '''Writes word_probs, res_word_stats and res_rule_stats to output_dir. Inputs can be TSV, Parquet or Arrow IPC files; the outputs are written in file_format. word_probs is written in a thread while the rules are detected (in a process pool for n_jobs > 1); then both stats are written in parallel threads. With profile or the environment variable ACCENT_ANALYSER_PROFILE set, the time and memory of each stage are written to profile.json and profile.csv (TSV) in output_dir.'''
   logger = getLogger(__name__)
 
-  merged_df = None
   for path in paths:
     if not path.exists():
       logger.error("Path does not exist!")
       return
-    df = pd.read_csv(path, sep="\t", na_filter=False)
-    if merged_df is None:
-      merged_df = df
-    else:
-      merged_df = pd.concat([merged_df, df])
 
-  words = df_to_data(merged_df)
+  enabled_here = (profile or is_requested_by_env()) and not is_enabled()
+  if enabled_here:
+    enable()
+  reset()
+  try:
+    run_reports(paths, output_dir, rules_store_path, n_jobs, file_format)
+    if is_enabled():
+      json_path, _ = write_profile(output_dir)
+      logger.info(f"Wrote profile to {json_path}.")
+  finally:
+    if enabled_here:
+      disable()
+
+
+def run_reports(paths: List[Path], output_dir: Path, rules_store_path: Optional[Path], n_jobs: int, file_format: str) -> None:
+  logger = getLogger(__name__)
+  total_start = perf_counter()
+  output_dir.mkdir(parents=True, exist_ok=True)
 
-  phoneme_occurrences = get_phoneme_occurrences(words)
-  phone_occurrences = get_phone_occurrences(words)
+  start = perf_counter()
+  occurrences = count_words(paths)
+  logger.info(f"Counted {occurrences.total} words ({len(occurrences)} unique) in {perf_counter() - start:.2f}s.")
+  words = OrderedSet(occurrences.phone_occurrences.keys())
 
-  word_probs = get_probabilities(phone_occurrences, phoneme_occurrences)
-  word_probs_df = probabilities_to_df(word_probs)
+  with ThreadPoolExecutor(max_workers=3) as executor:
+    word_probs_future = executor.submit(
+      write_word_probs, get_output_path(output_dir, "word_probs", file_format), occurrences, file_format)
 
-  output_path = Path("out/word_probs.csv")
-  output_path.parent.mkdir(parents=False, exist_ok=True)
-  word_probs_df.to_csv(output_path, sep="\t", header=True, index=False)
+    start = perf_counter()
+    with open_rules_store(rules_store_path) as rules_store:
+      rules_cache = RulesCache(store=rules_store)
+      word_rules = get_rules_from_words(words, rules_cache, n_jobs=n_jobs)
+    if rules_store is not None:
+      logger.info(f"Loaded rules of {rules_cache.store_hits} words from {rules_store_path}.")
+    logger.info(f"Detected rules of {len(word_rules)} words in {perf_counter() - start:.2f}s.")
 
-  word_rules = get_rules_from_words(words)
-  word_stats = get_word_stats(word_rules, phone_occurrences, phoneme_occurrences)
-  word_stats_df = word_stats_to_df(word_stats)
+    futures = [
+      word_probs_future,
+      executor.submit(write_word_stats, get_output_path(
+        output_dir, "res_word_stats", file_format), word_rules, occurrences, file_format),
+      executor.submit(write_rule_stats, get_output_path(
+        output_dir, "res_rule_stats", file_format), word_rules, occurrences, file_format),
+    ]
+    for future in futures:
+      future.result()
 
-  output_path = Path("out/res_word_stats.csv")
-  output_path.parent.mkdir(parents=False, exist_ok=True)
-  word_stats_df.to_csv(output_path, sep="\t", header=True, index=False)
+  logger.info(f"Wrote all reports to {output_dir} in {perf_counter() - total_start:.2f}s.")
 
-  rule_stats = get_rule_stats(word_rules, phone_occurrences)
-  rule_stats_df = rule_stats_to_df(rule_stats)
 
-  output_path = Path("out/res_rule_stats.csv")
-  output_path.parent.mkdir(parents=False, exist_ok=True)
-  rule_stats_df.to_csv(output_path, sep="\t", header=True, index=False)
+@instrumented("word_probs_report")
+def write_word_probs(output_path: Path, occurrences: Occurrences, file_format: str) -> None:
+  logger = getLogger(__name__)
+  start = perf_counter()
+  word_probs_df = get_probabilities_df(occurrences.phone_occurrences,
+                                       occurrences.phoneme_occurrences)
+  write_df(output_path, word_probs_df, file_format)
+  logger.info(f"Wrote {output_path} in {perf_counter() - start:.2f}s.")
+
+
+@instrumented("word_stats_report")
+def write_word_stats(output_path: Path, word_rules: OrderedDictType[WordEntry, WordRules], occurrences: Occurrences, file_format: str) -> None:
+  logger = getLogger(__name__)
+  start = perf_counter()
+  word_stats = iter_word_stats(word_rules, occurrences.phone_occurrences,
+                               occurrences.phoneme_occurrences)
+  write_rows(output_path, WORD_STATS_COLUMNS, word_stats, file_format)
+  logger.info(f"Wrote {output_path} in {perf_counter() - start:.2f}s.")
+
+
+@instrumented("rule_stats_report")
+def write_rule_stats(output_path: Path, word_rules: OrderedDictType[WordEntry, WordRules], occurrences: Occurrences, file_format: str) -> None:
+  logger = getLogger(__name__)
+  start = perf_counter()
+  rule_stats = iter_rule_stats(word_rules, occurrences.phone_occurrences)
+  write_rows(output_path, RULE_STATS_COLUMNS, rule_stats, file_format)
+  logger.info(f"Wrote {output_path} in {perf_counter() - start:.2f}s.")
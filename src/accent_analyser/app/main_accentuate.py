@@ -0,0 +1,38 @@
+from logging import getLogger
+from pathlib import Path
+from time import perf_counter
+
+from accent_analyser.app.main import load_probabilities
+from accent_analyser.core.accentuation import (DEFAULT_SENTENCES_CHUNKSIZE,
+                                               accentuate_sentences_chunked)
+
+
+def accentuate_corpus(input_path: Path, output_path: Path, probabilities_path: Path, seed: int = 0, n_jobs: int = 1, chunksize: int = DEFAULT_SENTENCES_CHUNKSIZE) -> None:
+  '''Reads one phoneme sentence per line from input_path and writes the accentuated sentences line by line to output_path.'''
+  logger = getLogger(__name__)
+
+  for path in [input_path, probabilities_path]:
+    if not path.exists():
+      logger.error("Path does not exist!")
+      return
+
+  probabilities = load_probabilities(probabilities_path)
+
+  start = perf_counter()
+  output_path.parent.mkdir(parents=True, exist_ok=True)
+  count = 0
+  with input_path.open(mode="r", encoding="utf-8") as input_file, output_path.open(mode="w", encoding="utf-8") as output_file:
+    sentences = (line.rstrip("\n") for line in input_file)
+    for sentence in accentuate_sentences_chunked(sentences, probabilities, seed, n_jobs, chunksize):
+      output_file.write(sentence)
+      output_file.write("\n")
+      count += 1
+  logger.info(f"Accentuated {count} sentences in {perf_counter() - start:.2f}s.")
+
+
+if __name__ == "__main__":
+  accentuate_corpus(
+    input_path=Path("in/sentences.txt"),
+    output_path=Path("out/sentences_accentuated.txt"),
+    probabilities_path=Path("out/word_probs.csv"),
+  )
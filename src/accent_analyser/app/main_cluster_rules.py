@@ -1,56 +1,83 @@
 from collections import OrderedDict
 from logging import getLogger
 from pathlib import Path
-from typing import List
-
-import pandas as pd
-from accent_analyser.core.cluster_rules import (cluster_fingerprints,
-                                                get_fingerprint)
-from accent_analyser.core.rule_detection import (df_to_data,
-                                                 get_phone_occurrences,
-                                                 get_phoneme_occurrences,
+from time import perf_counter
+from typing import Iterator, List, Optional
+from typing import OrderedDict as OrderedDictType
+from typing import Tuple
+
+from accent_analyser.app.io import count_words, open_rules_store
+from accent_analyser.core.cluster_rules import (AGGLOMERATIVE, COSINE,
+                                                Fingerprint,
+                                                cluster_distances,
+                                                get_condensed_distances,
+                                                get_fingerprint,
+                                                get_fingerprints_matrix)
+from accent_analyser.core.fingerprint_index import FingerprintIndex
+from accent_analyser.core.occurrences import Occurrences
+from accent_analyser.core.rule_detection import (Rule, RulesCache,
+                                                 WordEntry, WordRules,
                                                  get_rules_from_words)
-from text_utils.ipa2symb import IPAExtractionSettings
+from ordered_set import OrderedSet
 
 
-def main(speaker_paths: List[Path]):
-  logger = getLogger(__name__)
+def iter_speakers(speaker_paths: List[Path], rules_cache: RulesCache, all_rules: OrderedSet[Rule], n_jobs: int = 1) -> Iterator[Tuple[Path, OrderedDictType[WordEntry, WordRules], Occurrences, Fingerprint]]:
+  '''Reads one speaker at a time and yields its word rules, occurrences and fingerprint. The rules of each speaker are added to all_rules.'''
+  for speaker_path in speaker_paths:
+    occurrences = count_words([speaker_path])
+    speaker_words = OrderedSet(occurrences.phone_occurrences.keys())
+    speaker_word_rules = get_rules_from_words(speaker_words, rules_cache, n_jobs=n_jobs)
+    all_rules.update(x for y in speaker_word_rules.values() for x in y.values())
+    speaker_fingerprint = get_fingerprint(speaker_word_rules, occurrences.phone_occurrences,
+                                          occurrences.phoneme_occurrences, all_rules)
+    yield speaker_path, speaker_word_rules, occurrences, speaker_fingerprint
 
-  ipa_settings = IPAExtractionSettings(
-    ignore_arcs=True,
-    ignore_tones=True,
-    replace_unknown_ipa_by="_",
-  )
 
-  all_dfs = []
+def main(speaker_paths: List[Path], n_clusters: int = 2, method: str = AGGLOMERATIVE, metric: str = COSINE, rules_store_path: Optional[Path] = None, index_path: Optional[Path] = None, n_jobs: int = 1) -> OrderedDictType[Path, int]:
+  '''Returns the cluster of each speaker; an empty dict if there are no speakers or a path does not exist.'''
+  logger = getLogger(__name__)
+
+  if len(speaker_paths) == 0:
+    logger.info("No speakers to cluster.")
+    return OrderedDict()
 
   for speaker_path in speaker_paths:
     if not speaker_path.exists():
-      logger.error("Path does not exist!")
-      return
-    speaker_df = pd.read_csv(speaker_path, sep="\t", na_filter=False)
-    all_dfs.append(speaker_df)
-
-  speaker_words = {i: df_to_data(speaker_df, ipa_settings=ipa_settings)
-                   for i, speaker_df in enumerate(all_dfs)}
-
-  all_rules = set()
-  for speaker_id, speaker_word in speaker_words.items():
-    speaker_word_rules = get_rules_from_words(speaker_word)
-    all_rules |= {x for y in speaker_word_rules.values() for x in y.values()}
-
-  speaker_fingerprints = OrderedDict()
-  for speaker_id, speaker_word in speaker_words.items():
-    speaker_phoneme_occurrences = get_phoneme_occurrences(speaker_word)
-    speaker_phone_occurrences = get_phone_occurrences(speaker_word)
-    speaker_word_rules = get_rules_from_words(speaker_word)
-
-    speaker_fingerprint = get_fingerprint(speaker_word_rules, speaker_phone_occurrences,
-                                          speaker_phoneme_occurrences, all_rules)
-    speaker_fingerprints[speaker_id] = speaker_fingerprint
-
-  cluster = cluster_fingerprints(list(speaker_fingerprints.values()))
-  logger.info("Speaker similarities: ...")
+      logger.error(f"Path {speaker_path} does not exist!")
+      return OrderedDict()
+
+  start = perf_counter()
+  all_rules = OrderedSet()
+  speaker_fingerprints = []
+  with open_rules_store(rules_store_path) as rules_store:
+    rules_cache = RulesCache(store=rules_store)
+    for _, _, _, speaker_fingerprint in iter_speakers(speaker_paths, rules_cache, all_rules, n_jobs):
+      speaker_fingerprints.append(speaker_fingerprint)
+  logger.info(f"Built {len(speaker_fingerprints)} fingerprints of {len(all_rules)} rules in {perf_counter() - start:.2f}s.")
+
+  logger.info(
+    f"Rules cache: {rules_cache.hits} hits, {rules_cache.misses} misses, {rules_cache.store_hits} loaded from store.")
+
+  fingerprints = get_fingerprints_matrix(speaker_fingerprints)
+  if index_path is not None:
+    start = perf_counter()
+    index = FingerprintIndex()
+    index.add([str(speaker_path) for speaker_path in speaker_paths], fingerprints)
+    index.save(index_path)
+    logger.info(f"Saved index of {len(index)} speakers to {index_path} in {perf_counter() - start:.2f}s.")
+
+  start = perf_counter()
+  distances = get_condensed_distances(fingerprints, metric)
+  logger.info(f"Computed {metric} distances in {perf_counter() - start:.2f}s.")
+
+  start = perf_counter()
+  labels = cluster_distances(distances, min(n_clusters, len(speaker_paths)), method)
+  logger.info(f"Clustered with {method} in {perf_counter() - start:.2f}s.")
+
+  res = OrderedDict(zip(speaker_paths, (int(label) for label in labels)))
+  for speaker_path, label in res.items():
+    logger.info(f"{speaker_path}: cluster {label}")
+  return res
 
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+from accent_analyser.core.probability_sampler import ProbabilitySampler
 from accent_analyser.core.word_probabilities import (
     ProbabilitiesDict, Symbols, check_probabilities_are_valid,
     replace_with_prob)
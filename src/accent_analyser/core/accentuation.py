@@ -0,0 +1,109 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from accent_analyser.core.probability_sampler import ProbabilitySampler
+from accent_analyser.core.rule_detection import STRIP_SYMBOLS
+from accent_analyser.core.word_probabilities import ProbabilitiesDict, Symbols
+from text_utils import Language, SymbolFormat, text_to_symbols
+
+DEFAULT_SENTENCES_CHUNKSIZE = 1000
+WORD_SEPARATOR = " "
+
+_worker_sampler: Optional[ProbabilitySampler] = None
+
+
+def get_word_spans(symbols: Symbols) -> List[Tuple[int, int]]:
+  '''Returns start and end of each word without leading and trailing STRIP_SYMBOLS; words are separated by WORD_SEPARATOR.'''
+  res = []
+  word_start = 0
+  for position in range(len(symbols) + 1):
+    if position < len(symbols) and symbols[position] != WORD_SEPARATOR:
+      continue
+    start, end = word_start, position
+    while start < end and symbols[start] in STRIP_SYMBOLS:
+      start += 1
+    while end > start and symbols[end - 1] in STRIP_SYMBOLS:
+      end -= 1
+    if start < end:
+      res.append((start, end))
+    word_start = position + 1
+  return res
+
+
+def accentuate_symbols_batch(sentences: List[Symbols], sampler: ProbabilitySampler) -> List[Symbols]:
+  '''Replaces all words of the sentences that are in the sampler by a sampled pronunciation; all replacements are drawn at once. Unknown words stay unchanged.'''
+  spans = []
+  for sentence in sentences:
+    spans.append([(start, end) for start, end in get_word_spans(sentence)
+                  if sentence[start:end] in sampler])
+  replacements = iter(sampler.sample_many(
+    sentence[start:end] for sentence, sentence_spans in zip(sentences, spans)
+    for start, end in sentence_spans))
+
+  res = []
+  for sentence, sentence_spans in zip(sentences, spans):
+    accentuated = []
+    last_end = 0
+    for start, end in sentence_spans:
+      accentuated.extend(sentence[last_end:start])
+      accentuated.extend(next(replacements))
+      last_end = end
+    accentuated.extend(sentence[last_end:])
+    res.append(tuple(accentuated))
+  return res
+
+
+def accentuate_sentences(sentences: List[str], sampler: ProbabilitySampler) -> List[str]:
+  all_symbols = [
+    tuple(text_to_symbols(sentence, text_format=SymbolFormat.PHONEMES_IPA, lang=Language.ENG))
+    for sentence in sentences
+  ]
+  res = ["".join(symbols) for symbols in accentuate_symbols_batch(all_symbols, sampler)]
+  return res
+
+
+def get_chunk_seed(seed: int, chunk_nr: int) -> int:
+  res = int(np.random.SeedSequence((seed, chunk_nr)).generate_state(1)[0])
+  return res
+
+
+def init_worker(probabilities: ProbabilitiesDict) -> None:
+  global _worker_sampler
+  _worker_sampler = ProbabilitySampler(probabilities)
+
+
+def accentuate_chunk(chunk: Tuple[List[str], int]) -> List[str]:
+  sentences, chunk_seed = chunk
+  assert _worker_sampler is not None
+  _worker_sampler.seed(chunk_seed)
+  return accentuate_sentences(sentences, _worker_sampler)
+
+
+def accentuate_sentences_chunked(sentences: Iterable[str], probabilities: ProbabilitiesDict, seed: int = 0, n_jobs: int = 1, chunksize: int = DEFAULT_SENTENCES_CHUNKSIZE) -> Iterator[str]:
+  '''Accentuates the sentences in chunks and yields them in input order. Each chunk gets its own seed, so the output does not depend on n_jobs. With n_jobs > 1 the chunks are processed in a process pool of which at most 2 * n_jobs chunks are pending.'''
+  assert n_jobs > 0
+  assert chunksize > 0
+  sentences = iter(sentences)
+  chunks = (
+    (chunk, get_chunk_seed(seed, chunk_nr))
+    for chunk_nr, chunk in enumerate(iter(lambda: list(islice(sentences, chunksize)), []))
+  )
+
+  if n_jobs == 1:
+    sampler = ProbabilitySampler(probabilities)
+    for chunk, chunk_seed in chunks:
+      sampler.seed(chunk_seed)
+      yield from accentuate_sentences(chunk, sampler)
+    return
+
+  with ProcessPoolExecutor(max_workers=n_jobs, initializer=init_worker, initargs=(probabilities,)) as executor:
+    pending = deque()
+    for chunk in chunks:
+      pending.append(executor.submit(accentuate_chunk, chunk))
+      if len(pending) >= 2 * n_jobs:
+        yield from pending.popleft().result()
+    while len(pending) > 0:
+      yield from pending.popleft().result()
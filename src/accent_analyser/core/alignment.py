@@ -0,0 +1,116 @@
+from collections import Counter
+from difflib import ndiff
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+DiffLine = Tuple[str, str]
+MatchingBlock = Tuple[int, int, int]
+
+EQUAL_TAG = "  "
+ADD_TAG = "+ "
+REMOVE_TAG = "- "
+
+# SequenceMatcher starts to treat popular elements as junk from this length on
+_AUTOJUNK_MIN_LENGTH = 200
+# Differ synchronizes a replaced block on the most similar pair if its ratio exceeds this value
+_FANCY_RATIO = 0.74
+
+
+def get_diff_lines(a: Sequence[str], b: Sequence[str]) -> List[DiffLine]:
+  '''Returns the same lines as `difflib.ndiff(a, b)`, split into (tag, value).'''
+  if len(b) >= _AUTOJUNK_MIN_LENGTH:
+    return [(line[:2], line[2:]) for line in ndiff(a, b)]
+
+  if len(a) == len(b) and all(x == y for x, y in zip(a, b)):
+    return [(EQUAL_TAG, x) for x in a]
+
+  res: List[DiffLine] = []
+  i = j = 0
+  for block_i, block_j, size in get_matching_blocks(a, b):
+    if i < block_i and j < block_j:
+      add_replace_lines(res, a, i, block_i, b, j, block_j)
+    elif i < block_i:
+      res += [(REMOVE_TAG, x) for x in a[i:block_i]]
+    elif j < block_j:
+      res += [(ADD_TAG, x) for x in b[j:block_j]]
+    res += [(EQUAL_TAG, x) for x in a[block_i:block_i + size]]
+    i = block_i + size
+    j = block_j + size
+  return res
+
+
+def get_matching_blocks(a: Sequence[str], b: Sequence[str]) -> List[MatchingBlock]:
+  '''Ratcliff/Obershelp matching like `SequenceMatcher(None, a, b)` does for inputs without autojunk. The last block is always the sentinel (len(a), len(b), 0).'''
+  b2j: Dict[str, List[int]] = {}
+  for j, symbol in enumerate(b):
+    b2j.setdefault(symbol, []).append(j)
+
+  blocks: List[MatchingBlock] = []
+  queue = [(0, len(a), 0, len(b))]
+  while queue:
+    alo, ahi, blo, bhi = queue.pop()
+    block = find_longest_match(a, b2j, alo, ahi, blo, bhi)
+    i, j, k = block
+    if k > 0:
+      blocks.append(block)
+      if alo < i and blo < j:
+        queue.append((alo, i, blo, j))
+      if i + k < ahi and j + k < bhi:
+        queue.append((i + k, ahi, j + k, bhi))
+  blocks.sort()
+  blocks.append((len(a), len(b), 0))
+  return blocks
+
+
+def find_longest_match(a: Sequence[str], b2j: Dict[str, List[int]], alo: int, ahi: int, blo: int, bhi: int) -> MatchingBlock:
+  best_i, best_j, best_size = alo, blo, 0
+  j2len: Dict[int, int] = {}
+  for i in range(alo, ahi):
+    new_j2len: Dict[int, int] = {}
+    for j in b2j.get(a[i], ()):
+      if j < blo:
+        continue
+      if j >= bhi:
+        break
+      k = new_j2len[j] = j2len.get(j - 1, 0) + 1
+      if k > best_size:
+        best_i, best_j, best_size = i - k + 1, j - k + 1, k
+    j2len = new_j2len
+  return best_i, best_j, best_size
+
+
+def add_replace_lines(res: List[DiffLine], a: Sequence[str], alo: int, ahi: int, b: Sequence[str], blo: int, bhi: int) -> None:
+  if has_similar_pair(a[alo:ahi], b[blo:bhi]):
+    # rare case: Differ synchronizes on the similar pair and adds intraline hints; the hunk has no equal symbols, so ndiff of it is a single replacement
+    res.extend((line[:2], line[2:]) for line in ndiff(a[alo:ahi], b[blo:bhi]))
+    return
+
+  removed = [(REMOVE_TAG, x) for x in a[alo:ahi]]
+  added = [(ADD_TAG, x) for x in b[blo:bhi]]
+  if bhi - blo < ahi - alo:
+    res += added
+    res += removed
+  else:
+    res += removed
+    res += added
+
+
+def has_similar_pair(a: Sequence[str], b: Sequence[str]) -> bool:
+  '''Returns False only if no pair can reach the similarity Differ needs to synchronize on it.'''
+  return any(is_similar(symbol_a, symbol_b) for symbol_a in a for symbol_b in b)
+
+
+@lru_cache(maxsize=65536)
+def is_similar(symbol_a: str, symbol_b: str) -> bool:
+  '''Upper bound of the similarity ratio like `SequenceMatcher.quick_ratio`.'''
+  total_length = len(symbol_a) + len(symbol_b)
+  if total_length == 0:
+    return False
+  available = Counter(symbol_b)
+  matches = 0
+  for char in symbol_a:
+    if available[char] > 0:
+      available[char] -= 1
+      matches += 1
+  upper_bound = 2.0 * matches / total_length
+  return upper_bound > _FANCY_RATIO
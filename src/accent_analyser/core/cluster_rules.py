@@ -1,27 +1,272 @@
-from collections import OrderedDict
-from typing import Any, List, Optional
+from typing import List, Optional
 from typing import OrderedDict as OrderedDictType
-from typing import Set, Tuple
 
+import numpy as np
+from accent_analyser.core.instrumentation import instrumented
 from accent_analyser.core.rule_detection import (PhonemeOccurrences,
                                                  PhoneOccurrences, Rule,
-                                                 RuleType, WordEntry,
-                                                 WordRules, rule_to_str,
-                                                 rules_to_str)
+                                                 WordEntry, WordRules)
 from accent_analyser.core.rule_stats import (get_rule_occurrences,
                                              word_rules_to_rules_dict)
 from ordered_set import OrderedSet
-from pandas import DataFrame
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.sparse import csc_matrix, csr_matrix, spmatrix, vstack
+from scipy.spatial.distance import squareform
 
+Fingerprint = csr_matrix
 
-def get_fingerprint(speaker_word_rules: OrderedDictType[WordEntry, WordRules], speaker_phone_occurrences: PhoneOccurrences, speaker_phoneme_occurrences: PhonemeOccurrences, all_rules: OrderedSet[Rule]) -> Any:
+COSINE = "cosine"
+JENSEN_SHANNON = "jensenshannon"
+METRICS = (COSINE, JENSEN_SHANNON)
+
+AGGLOMERATIVE = "agglomerative"
+K_MEDOIDS = "k-medoids"
+METHODS = (AGGLOMERATIVE, K_MEDOIDS)
+
+DEFAULT_BLOCK_SIZE = 1024
+DEFAULT_MAX_ITERATIONS = 100
+
+
+def get_fingerprint(speaker_word_rules: OrderedDictType[WordEntry, WordRules], speaker_phone_occurrences: PhoneOccurrences, speaker_phoneme_occurrences: PhonemeOccurrences, all_rules: OrderedSet[Rule]) -> Fingerprint:
+  '''Returns the relative rule frequencies of a speaker as sparse 1 x len(all_rules) vector. Rules missing in all_rules are appended to it, so fingerprints built earlier can be shorter.'''
   speaker_words_to_rules = word_rules_to_rules_dict(speaker_word_rules)
   speaker_rule_occurrences = get_rule_occurrences(speaker_words_to_rules, speaker_phone_occurrences)
 
+  columns = []
+  values = []
+  for rule, occurrences in speaker_rule_occurrences.items():
+    if rule is None or occurrences == 0:
+      continue
+    columns.append(all_rules.add(rule))
+    values.append(occurrences)
+
+  values = np.array(values, dtype=np.float64)
+  total = values.sum()
+  if total > 0:
+    values /= total
+
+  res = csr_matrix(
+    (values, (np.zeros(len(columns), dtype=np.int64), np.array(columns, dtype=np.int64))),
+    shape=(1, len(all_rules)),
+  )
+  res.sort_indices()
+  return res
+
+
+def get_fingerprints_matrix(fingerprints: List[Fingerprint]) -> csr_matrix:
+  '''Stacks the fingerprints into one speakers x rules matrix; shorter fingerprints are padded with zeros.'''
+  n_rules = max((fingerprint.shape[1] for fingerprint in fingerprints), default=0)
+  padded = [
+    csr_matrix((fingerprint.data, fingerprint.indices, fingerprint.indptr),
+               shape=(fingerprint.shape[0], n_rules))
+    for fingerprint in fingerprints
+  ]
+  if len(padded) == 0:
+    return csr_matrix((0, n_rules), dtype=np.float64)
+  res = vstack(padded, format="csr")
+  return res
+
+
+def get_normalized(fingerprints: csr_matrix) -> csr_matrix:
+  '''Scales the fingerprints to an L2 norm of 1 (empty ones stay empty).'''
+  fingerprints = csr_matrix(fingerprints, dtype=np.float64)
+  norms = np.sqrt(np.asarray(fingerprints.multiply(fingerprints).sum(axis=1)).ravel())
+  inverse_norms = np.zeros_like(norms)
+  np.divide(1.0, norms, out=inverse_norms, where=norms > 0)
+  res = csr_matrix(fingerprints.multiply(inverse_norms[:, np.newaxis]))
+  res.eliminate_zeros()
+  return res
+
+
+def get_cosine_similarities(fingerprints: csr_matrix) -> np.ndarray:
+  normalized = get_normalized(fingerprints)
+  res = (normalized @ normalized.T).toarray()
+  return res
+
+
+def get_js_divergences(fingerprints: csr_matrix) -> np.ndarray:
+  '''Jensen-Shannon divergences (base 2) of all pairs of normalized fingerprints. Only the rules two speakers share contribute, so the work is the sum of squared speakers per rule. Empty fingerprints have a divergence of 1 to all other fingerprints.'''
+  res = get_js_divergences_block(get_rule_columns(fingerprints), 0, fingerprints.shape[0])
+  return res
+
+
+def get_rule_columns(fingerprints: csr_matrix) -> csc_matrix:
+  '''Converts the fingerprints once for get_js_divergences_block.'''
+  res = csc_matrix(fingerprints, dtype=np.float64)
+  res.eliminate_zeros()
+  res.sort_indices()
+  return res
+
+
+def get_js_divergences_block(columns: csc_matrix, start: int, end: int, max_pairs: Optional[int] = None) -> np.ndarray:
+  '''Jensen-Shannon divergences of the fingerprints start..end to all fingerprints; columns are the fingerprints from get_rule_columns. All pairs of speakers sharing a rule are generated at once, in chunks of at most max_pairs (default: the size of the block).'''
+  n_speakers = columns.shape[0]
+  n_rows = end - start
+  if max_pairs is None:
+    max_pairs = max(n_rows * n_speakers, 1)
+  rows = columns.indices
+  values = columns.data
+  speakers_per_rule = np.diff(columns.indptr)
+  entry_rules = np.repeat(np.arange(columns.shape[1]), speakers_per_rule)
+  f_values = values * np.log2(values)
+
+  # a rule of a single speaker adds nothing to the sums of the pairs of different speakers
+  block_entries = np.flatnonzero((rows >= start) & (rows < end) & (speakers_per_rule[entry_rules] > 1))
+  pairs_counts = speakers_per_rule[entry_rules[block_entries]]
+  pairs_ends = np.cumsum(pairs_counts)
+
+  # shared[i, j] = sum over shared rules of f(p + q) - f(p) - f(q) with f(x) = x * log2(x)
+  shared = np.zeros(n_rows * n_speakers, dtype=np.float64)
+  chunk_start = 0
+  while chunk_start < len(block_entries):
+    offset = pairs_ends[chunk_start] - pairs_counts[chunk_start]
+    chunk_end = max(int(np.searchsorted(pairs_ends, offset + max_pairs, side="right")), chunk_start + 1)
+    entries = block_entries[chunk_start:chunk_end]
+    counts = pairs_counts[chunk_start:chunk_end]
+    left = np.repeat(entries, counts)
+    positions = np.arange(len(left)) - np.repeat(np.cumsum(counts) - counts, counts)
+    right = np.repeat(columns.indptr[entry_rules[entries]], counts) + positions
+    sums = values[left] + values[right]
+    terms = sums * np.log2(sums) - f_values[left] - f_values[right]
+    shared += np.bincount((rows[left] - start) * n_speakers + rows[right],
+                          weights=terms, minlength=len(shared))
+    chunk_start = chunk_end
+
+  res = 1.0 - 0.5 * shared.reshape(n_rows, n_speakers)
+  is_empty = np.bincount(rows, minlength=n_speakers) == 0
+  res[is_empty[start:end], :] = 1.0
+  res[:, is_empty] = 1.0
+  res[np.ix_(is_empty[start:end], is_empty)] = 0.0
+  np.clip(res, 0.0, 1.0, out=res)
+  res[np.arange(n_rows), np.arange(start, end)] = 0.0
+  return res
+
+
+def get_cosine_distances_block(normalized: csr_matrix, start: int, end: int) -> np.ndarray:
+  '''Cosine distances of the fingerprints start..end to all fingerprints; normalized are the fingerprints from get_normalized. Empty fingerprints have a distance of 1 to all other fingerprints.'''
+  res = 1.0 - (normalized[start:end] @ normalized.T).toarray()
+  is_empty = normalized.getnnz(axis=1) == 0
+  res[np.ix_(is_empty[start:end], is_empty)] = 0.0
+  np.clip(res, 0.0, 2.0, out=res)
+  res[np.arange(end - start), np.arange(start, end)] = 0.0
+  return res
+
+
+def prepare_fingerprints(fingerprints: csr_matrix, metric: str) -> spmatrix:
+  '''Converts the fingerprints once into the form get_distances_block expects for metric.'''
+  assert metric in METRICS
+  if metric == COSINE:
+    return get_normalized(fingerprints)
+  return get_rule_columns(fingerprints)
+
+
+def get_distances_block(prepared: spmatrix, start: int, end: int, metric: str) -> np.ndarray:
+  '''Distances of the fingerprints start..end to all fingerprints; prepared are the fingerprints from prepare_fingerprints. The Jensen-Shannon distance is the square root of the divergence, like in scipy.'''
+  assert metric in METRICS
+  if metric == COSINE:
+    return get_cosine_distances_block(prepared, start, end)
+  return np.sqrt(get_js_divergences_block(prepared, start, end))
+
+
+@instrumented("distances")
+def get_condensed_distances(fingerprints: csr_matrix, metric: str = COSINE, block_size: int = DEFAULT_BLOCK_SIZE) -> np.ndarray:
+  '''Returns the pairwise distances in condensed form (see scipy.spatial.distance.squareform). They are computed for block_size rows at a time, so that apart from the result at most block_size x speakers distances are held in memory.'''
+  assert block_size > 0
+  n_speakers = fingerprints.shape[0]
+  prepared = prepare_fingerprints(fingerprints, metric)
+  res = np.empty(n_speakers * (n_speakers - 1) // 2, dtype=np.float64)
+  for start in range(0, n_speakers, block_size):
+    end = min(start + block_size, n_speakers)
+    block = get_distances_block(prepared, start, end, metric)
+    for row in range(start, end):
+      offset = get_condensed_offset(row, n_speakers)
+      res[offset:offset + n_speakers - row - 1] = block[row - start, row + 1:]
+  return res
+
+
+def get_condensed_offset(row: int, n_speakers: int) -> int:
+  '''Position of the distance of (row, row + 1) in the condensed distances.'''
+  return row * n_speakers - row * (row + 1) // 2
+
+
+def compare_two_fingerprints(fingerprint1: Fingerprint, fingerprint2: Fingerprint) -> float:
+  '''Returns the cosine similarity of both fingerprints.'''
+  similarities = get_cosine_similarities(get_fingerprints_matrix([fingerprint1, fingerprint2]))
+  return float(similarities[0, 1])
+
+
+@instrumented("speaker_clustering")
+def cluster_fingerprints(fingerprints: List[Fingerprint], n_clusters: int, method: str = AGGLOMERATIVE, metric: str = COSINE, block_size: int = DEFAULT_BLOCK_SIZE, seed: int = 0) -> np.ndarray:
+  '''Returns the cluster label (0..n_clusters - 1) of each fingerprint.'''
+  distances = get_condensed_distances(get_fingerprints_matrix(fingerprints), metric, block_size)
+  res = cluster_distances(distances, n_clusters, method, seed)
+  return res
+
+
+def cluster_distances(distances: np.ndarray, n_clusters: int, method: str = AGGLOMERATIVE, seed: int = 0) -> np.ndarray:
+  '''Clusters precomputed distances, either condensed or as square matrix.'''
+  assert method in METHODS
+  if distances.ndim == 2:
+    distances = squareform(distances, checks=False)
+  n_speakers = get_speakers_count(distances)
+  assert 0 < n_clusters <= max(n_speakers, 1)
+  if n_speakers <= 1:
+    return np.zeros(n_speakers, dtype=np.int64)
+  if method == AGGLOMERATIVE:
+    return cluster_agglomerative(distances, n_clusters)
+  return cluster_k_medoids(squareform(distances), n_clusters, seed)
+
+
+def get_speakers_count(distances: np.ndarray) -> int:
+  res = int(round((1 + np.sqrt(1 + 8 * len(distances))) / 2))
+  assert res * (res - 1) // 2 == len(distances)
+  return res
+
+
+def cluster_agglomerative(distances: np.ndarray, n_clusters: int) -> np.ndarray:
+  '''Average linkage clustering of condensed distances.'''
+  linkage_matrix = linkage(distances, method="average")
+  res = fcluster(linkage_matrix, t=n_clusters, criterion="maxclust").astype(np.int64) - 1
+  return res
+
+
+def cluster_k_medoids(distances: np.ndarray, n_clusters: int, seed: int = 0, max_iterations: int = DEFAULT_MAX_ITERATIONS) -> np.ndarray:
+  '''K-medoids clustering of a square distance matrix; the medoids are initialized like k-means++ and then refined by alternating assignment and medoid updates.'''
+  medoids = get_initial_medoids(distances, n_clusters, np.random.default_rng(seed))
+  labels = assign_to_medoids(distances, medoids)
+  for _ in range(max_iterations):
+    new_medoids = medoids.copy()
+    for cluster in range(n_clusters):
+      members = np.flatnonzero(labels == cluster)
+      costs = distances[np.ix_(members, members)].sum(axis=1)
+      new_medoids[cluster] = members[np.argmin(costs)]
+    if np.array_equal(new_medoids, medoids):
+      break
+    medoids = new_medoids
+    labels = assign_to_medoids(distances, medoids)
+  return labels
+
 
-def compare_two_fingerprints(fingerprint1: Any, fingerprint2: Any) -> float:
-  pass
+def assign_to_medoids(distances: np.ndarray, medoids: np.ndarray) -> np.ndarray:
+  res = np.argmin(distances[:, medoids], axis=1).astype(np.int64)
+  # each medoid stays in its own cluster, also if it has a distance of 0 to another medoid, so no cluster gets empty
+  res[medoids] = np.arange(len(medoids))
+  return res
 
 
-def cluster_fingerprints(fingerprints: List[Any]) -> float:
-  pass
+def get_initial_medoids(distances: np.ndarray, n_clusters: int, rng: np.random.Generator) -> np.ndarray:
+  n_speakers = distances.shape[0]
+  medoids = [int(rng.integers(n_speakers))]
+  closest = distances[medoids[0]].copy()
+  for _ in range(1, n_clusters):
+    weights = closest ** 2
+    weights[medoids] = 0
+    total = weights.sum()
+    if total > 0:
+      medoid = int(rng.choice(n_speakers, p=weights / total))
+    else:
+      medoid = int(rng.choice(np.setdiff1d(np.arange(n_speakers), medoids)))
+    medoids.append(medoid)
+    np.minimum(closest, distances[medoid], out=closest)
+  res = np.array(medoids, dtype=np.int64)
+  return res
@@ -0,0 +1,147 @@
+import pickle
+import zlib
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional
+from typing import OrderedDict as OrderedDictType
+from typing import Tuple
+
+from accent_analyser.core.occurrences import Occurrences
+from accent_analyser.core.rule_detection import (Rule, RulesCache, RuleType,
+                                                 WordEntry, WordRules,
+                                                 get_rules_from_words)
+from accent_analyser.core.symbol_table import SymbolTable
+
+CORPUS_STATS_FORMAT_VERSION = 1
+
+
+@dataclass()
+class CorpusStats():
+  occurrences: Occurrences = field(default_factory=Occurrences)
+  word_rules: OrderedDictType[WordEntry, WordRules] = field(default_factory=OrderedDict)
+
+
+def get_corpus_stats(words: Iterable[WordEntry], cache: Optional[RulesCache] = None, n_jobs: int = 1) -> CorpusStats:
+  occurrences = Occurrences(words)
+  word_rules = get_rules_from_words(occurrences.phone_occurrences.keys(), cache, n_jobs=n_jobs)
+  res = CorpusStats(
+    occurrences=occurrences,
+    word_rules=word_rules,
+  )
+  return res
+
+
+def merge_corpus_stats(stats1: CorpusStats, stats2: CorpusStats) -> CorpusStats:
+  occurrences = Occurrences()
+  occurrences.update(stats1.occurrences)
+  occurrences.update(stats2.occurrences)
+
+  word_rules = OrderedDict(stats1.word_rules)
+  for word, rules in stats2.word_rules.items():
+    if word not in word_rules:
+      word_rules[word] = rules
+
+  res = CorpusStats(
+    occurrences=occurrences,
+    word_rules=word_rules,
+  )
+  return res
+
+
+def corpus_stats_to_bytes(stats: CorpusStats) -> bytes:
+  '''Compact export: symbols are stored once and words and rules as flat integer arrays. Phoneme occurrences are restored from the phone occurrences.'''
+  table = SymbolTable()
+  words = list(dict.fromkeys(list(stats.occurrences.phone_occurrences) + list(stats.word_rules)))
+
+  word_symbol_ids = array("I")
+  word_lengths = array("I")
+  word_counts = array("Q")
+  for word in words:
+    for symbols in (word.graphemes, word.phonemes, word.phones):
+      word_symbol_ids.extend(table.encode(symbols))
+      word_lengths.append(len(symbols))
+    word_counts.append(stats.occurrences.phone_occurrences.get(word, 0))
+
+  rule_ids = {}
+  rules: List[Tuple[int, Tuple[int, ...], Tuple[int, ...]]] = []
+  word_rules: List[Optional[Tuple[Tuple[Tuple[int, ...], int], ...]]] = []
+  for word in words:
+    if word not in stats.word_rules:
+      word_rules.append(None)
+      continue
+    entries = []
+    for positions, rule in stats.word_rules[word].items():
+      if rule not in rule_ids:
+        rule_ids[rule] = len(rules)
+        rules.append((int(rule.rule_type), tuple(table.encode(rule.from_symbols)),
+                      tuple(table.encode(rule.to_symbols))))
+      entries.append((tuple(positions), rule_ids[rule]))
+    word_rules.append(tuple(entries))
+
+  payload = (
+    CORPUS_STATS_FORMAT_VERSION,
+    table.symbols,
+    word_symbol_ids.tobytes(),
+    word_lengths.tobytes(),
+    word_counts.tobytes(),
+    rules,
+    word_rules,
+  )
+  res = zlib.compress(pickle.dumps(payload, protocol=4))
+  return res
+
+
+def corpus_stats_from_bytes(data: bytes) -> CorpusStats:
+  version, symbols, word_symbol_ids_bytes, word_lengths_bytes, word_counts_bytes, rules_data, word_rules_data = pickle.loads(
+    zlib.decompress(data))
+  assert version == CORPUS_STATS_FORMAT_VERSION
+
+  table = SymbolTable()
+  for symbol in symbols:
+    table.get_id(symbol)
+
+  word_symbol_ids = array("I")
+  word_symbol_ids.frombytes(word_symbol_ids_bytes)
+  word_lengths = array("I")
+  word_lengths.frombytes(word_lengths_bytes)
+  word_counts = array("Q")
+  word_counts.frombytes(word_counts_bytes)
+
+  rules = [
+    Rule(
+      rule_type=RuleType(rule_type),
+      from_symbols=table.intern(table.decode(from_ids)),
+      to_symbols=table.intern(table.decode(to_ids)),
+    )
+    for rule_type, from_ids, to_ids in rules_data
+  ]
+
+  res = CorpusStats()
+  offset = 0
+  for word_nr, (count, entries) in enumerate(zip(word_counts, word_rules_data)):
+    all_symbols = []
+    for length in word_lengths[word_nr * 3:word_nr * 3 + 3]:
+      all_symbols.append(table.intern(table.decode(word_symbol_ids[offset:offset + length])))
+      offset += length
+    word = WordEntry(
+      graphemes=all_symbols[0],
+      phonemes=all_symbols[1],
+      phones=all_symbols[2],
+    )
+    if count > 0:
+      res.occurrences.add_count(word, count)
+    if entries is not None:
+      res.word_rules[word] = OrderedDict(
+        (positions, rules[rule_id]) for positions, rule_id in entries)
+  return res
+
+
+def save_corpus_stats(stats: CorpusStats, path: Path) -> None:
+  path.write_bytes(corpus_stats_to_bytes(stats))
+
+
+def load_corpus_stats(path: Path) -> CorpusStats:
+  res = corpus_stats_from_bytes(path.read_bytes())
+  return res
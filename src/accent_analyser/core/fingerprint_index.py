@@ -0,0 +1,141 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from accent_analyser.core.cluster_rules import (get_fingerprints_matrix,
+                                                get_normalized)
+from scipy.sparse import csr_matrix
+
+DEFAULT_BITS_COUNT = 14
+DEFAULT_TABLES_COUNT = 12
+FINGERPRINT_INDEX_FORMAT_VERSION = 1
+
+
+class FingerprintIndex():
+  '''Finds the speakers with the most similar fingerprints (cosine similarity) by random hyperplane LSH. Fingerprints in the same or a neighbouring bucket of any table are candidates; they are re-ranked exactly. Speakers can be added at any time, also with a grown rule vocabulary.'''
+
+  def __init__(self, bits_count: int = DEFAULT_BITS_COUNT, tables_count: int = DEFAULT_TABLES_COUNT, seed: int = 0) -> None:
+    assert 0 < bits_count < 63
+    assert tables_count > 0
+    self.bits_count = bits_count
+    self.tables_count = tables_count
+    self.seed = seed
+    self.keys: List[str] = []
+    self._key_ids: Dict[str, int] = {}
+    self._batches: List[csr_matrix] = []
+    self._matrix: Optional[csr_matrix] = None
+    self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(tables_count)]
+    self._hyperplanes = np.zeros((tables_count * bits_count, 0), dtype=np.float64)
+    self._bit_values = np.left_shift(1, np.arange(bits_count, dtype=np.int64))
+
+  def __len__(self) -> int:
+    return len(self.keys)
+
+  def __contains__(self, key: str) -> bool:
+    return key in self._key_ids
+
+  @property
+  def rules_count(self) -> int:
+    return self._hyperplanes.shape[1]
+
+  def add(self, keys: List[str], fingerprints: csr_matrix) -> None:
+    '''Adds one speaker per row of fingerprints.'''
+    assert len(keys) == fingerprints.shape[0]
+    self._add_normalized(keys, get_normalized(fingerprints))
+
+  def _add_normalized(self, keys: List[str], normalized: csr_matrix) -> None:
+    codes = self._get_codes(normalized)
+    self._batches.append(normalized)
+    self._matrix = None
+    for key, row_codes in zip(keys, codes):
+      assert key not in self._key_ids
+      item_id = len(self.keys)
+      self.keys.append(key)
+      self._key_ids[key] = item_id
+      for buckets, code in zip(self._buckets, row_codes):
+        buckets.setdefault(int(code), []).append(item_id)
+
+  def query(self, fingerprint: csr_matrix, k: int = 10) -> List[Tuple[str, float]]:
+    '''Returns up to k (key, cosine similarity) of the most similar speakers, most similar first. If there are fewer than k candidates, all speakers are compared.'''
+    assert k > 0
+    if len(self) == 0:
+      return []
+    query_row = get_normalized(fingerprint)[0]
+    candidates = self._get_candidates(self._get_codes(query_row)[0])
+    if len(candidates) < k:
+      candidate_ids = np.arange(len(self))
+    else:
+      candidate_ids = np.array(sorted(candidates), dtype=np.int64)
+
+    candidate_rows = get_fingerprints_matrix([self._get_matrix()[candidate_ids], query_row])
+    similarities = (candidate_rows[:-1] @ candidate_rows[-1].T).toarray().ravel()
+    k = min(k, len(candidate_ids))
+    best = np.argpartition(-similarities, k - 1)[:k]
+    best = best[np.lexsort((candidate_ids[best], -similarities[best]))]
+    res = [(self.keys[candidate_ids[i]], float(similarities[i])) for i in best]
+    return res
+
+  def _get_matrix(self) -> csr_matrix:
+    if self._matrix is None:
+      self._matrix = get_fingerprints_matrix(self._batches)
+    return self._matrix
+
+  def _get_candidates(self, codes: np.ndarray) -> Set[int]:
+    '''Items in the bucket of the codes or in a bucket with one flipped bit.'''
+    res = set()
+    for buckets, code in zip(self._buckets, codes):
+      code = int(code)
+      res.update(buckets.get(code, ()))
+      for bit_value in self._bit_values:
+        res.update(buckets.get(code ^ int(bit_value), ()))
+    return res
+
+  def _get_codes(self, fingerprints: csr_matrix) -> np.ndarray:
+    '''Returns tables_count bucket codes per fingerprint.'''
+    self._grow_hyperplanes(fingerprints.shape[1])
+    fingerprints = csr_matrix((fingerprints.data, fingerprints.indices, fingerprints.indptr),
+                              shape=(fingerprints.shape[0], self.rules_count))
+    projections = np.asarray(fingerprints @ self._hyperplanes.T)
+    bits = (projections > 0).reshape(fingerprints.shape[0], self.tables_count, self.bits_count)
+    res = bits.astype(np.int64) @ self._bit_values
+    return res
+
+  def _grow_hyperplanes(self, rules_count: int) -> None:
+    '''Adds hyperplane components for new rules. Existing fingerprints are 0 for these rules, so their codes stay valid.'''
+    old_count = self.rules_count
+    if rules_count <= old_count:
+      return
+    rng = np.random.default_rng((self.seed, old_count, rules_count))
+    new_components = rng.standard_normal((self.tables_count * self.bits_count, rules_count - old_count))
+    self._hyperplanes = np.hstack((self._hyperplanes, new_components))
+
+  def save(self, path: Path) -> None:
+    fingerprints = self._get_matrix()
+    with path.open(mode="wb") as file:
+      np.savez(
+        file,
+        format_version=FINGERPRINT_INDEX_FORMAT_VERSION,
+        bits_count=self.bits_count,
+        tables_count=self.tables_count,
+        seed=self.seed,
+        keys=np.array(self.keys, dtype=str),
+        hyperplanes=self._hyperplanes,
+        data=fingerprints.data,
+        indices=fingerprints.indices,
+        indptr=fingerprints.indptr,
+        shape=np.array(fingerprints.shape, dtype=np.int64),
+      )
+
+  @classmethod
+  def load(cls, path: Path) -> "FingerprintIndex":
+    with np.load(path, allow_pickle=False) as data:
+      assert int(data["format_version"]) == FINGERPRINT_INDEX_FORMAT_VERSION
+      res = cls(int(data["bits_count"]), int(data["tables_count"]), int(data["seed"]))
+      res._hyperplanes = data["hyperplanes"]
+      fingerprints = csr_matrix((data["data"], data["indices"], data["indptr"]),
+                                shape=tuple(data["shape"]))
+      keys = [str(key) for key in data["keys"]]
+    if len(keys) > 0:
+      res._add_normalized(keys, fingerprints)
+    return res
+
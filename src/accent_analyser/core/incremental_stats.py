@@ -0,0 +1,125 @@
+from bisect import insort
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional
+from typing import OrderedDict as OrderedDictType
+from typing import Set, Tuple
+
+from accent_analyser.core.occurrences import Occurrences
+from accent_analyser.core.rule_detection import (Graphemes, Phonemes, Rule,
+                                                 RulesCache, WordEntry,
+                                                 WordRules,
+                                                 get_rules_from_words,
+                                                 rule_to_str, rules_to_str)
+from accent_analyser.core.rule_stats import (RuleStatsEntry,
+                                             get_rule_sort_key,
+                                             get_rule_stats_entry,
+                                             get_rule_stats_sort_key)
+from accent_analyser.core.word_stats import (WordStatsEntry,
+                                             get_word_stats_entry,
+                                             get_word_stats_sort_key)
+from ordered_set import OrderedSet
+
+PhonemeGroup = Tuple[Graphemes, Phonemes]
+
+
+class IncrementalStats():
+  '''Word and rule stats of a growing corpus. After a batch of words is added, only the rows of the phoneme groups and rules of these words are rebuilt; the result equals get_word_stats and get_rule_stats of the whole corpus.'''
+
+  def __init__(self, cache: Optional[RulesCache] = None, n_jobs: int = 1) -> None:
+    self.occurrences = Occurrences()
+    self.word_rules: OrderedDictType[WordEntry, WordRules] = OrderedDict()
+    self._cache = RulesCache() if cache is None else cache
+    self._n_jobs = n_jobs
+    self._rules_strs: Dict[WordEntry, str] = {}
+    self._word_rule_keys: Dict[WordEntry, List[Optional[Rule]]] = {}
+
+    # phoneme groups in the order of sorted(phoneme_occurrences.keys())
+    self._groups: List[PhonemeGroup] = []
+    self._group_words: Dict[PhonemeGroup, List[WordEntry]] = {}
+    self._group_rows: Dict[PhonemeGroup, List[WordStatsEntry]] = {}
+    self._dirty_groups: Set[PhonemeGroup] = set()
+
+    # rules in the order of sort_rules; ties are ordered by first appearance
+    self._rule_sort_keys: List[Tuple[Tuple[int, Tuple[str, ...], int], int]] = []
+    self._rules: List[Optional[Rule]] = []
+    self._rule_words: Dict[Optional[Rule], List[WordEntry]] = {}
+    self._rule_rows: Dict[Optional[Rule], List[RuleStatsEntry]] = {}
+    self._dirty_rules: Set[Optional[Rule]] = set()
+    self._add_rule(None)
+
+  def add(self, words: Iterable[WordEntry]) -> None:
+    batch = Counter(words)
+    for word, count in batch.items():
+      self.occurrences.add_count(word, count)
+
+    new_words = OrderedSet(word for word in batch if word not in self.word_rules)
+    new_word_rules = get_rules_from_words(new_words, self._cache, n_jobs=self._n_jobs)
+    for word, rules in new_word_rules.items():
+      self._add_word(word, rules)
+
+    for word in batch:
+      self._dirty_groups.add((word.graphemes, word.phonemes))
+      self._dirty_rules.update(self._word_rule_keys[word])
+
+  def _add_word(self, word: WordEntry, rules: WordRules) -> None:
+    self.word_rules[word] = rules
+    self._rules_strs[word] = rules_to_str(rules)
+
+    group = (word.graphemes, word.phonemes)
+    if group not in self._group_words:
+      insort(self._groups, group)
+      self._group_words[group] = []
+    self._group_words[group].append(word)
+
+    rule_keys = list(dict.fromkeys(rules.values())) if len(rules) > 0 else [None]
+    self._word_rule_keys[word] = rule_keys
+    for rule in rule_keys:
+      if rule not in self._rule_words:
+        self._add_rule(rule)
+      self._rule_words[rule].append(word)
+
+  def _add_rule(self, rule: Optional[Rule]) -> None:
+    insort(self._rule_sort_keys, (get_rule_sort_key(rule), len(self._rules)))
+    self._rules.append(rule)
+    self._rule_words[rule] = []
+
+  def _update(self) -> None:
+    phone_occurrences = self.occurrences.phone_occurrences
+    phoneme_occurrences = self.occurrences.phoneme_occurrences
+
+    for group in self._dirty_groups:
+      total_occ = phoneme_occurrences[group]
+      rows = [
+        get_word_stats_entry(0, word, self._rules_strs[word], phone_occurrences[word], total_occ)
+        for word in self._group_words[group]
+      ]
+      rows.sort(key=get_word_stats_sort_key)
+      self._group_rows[group] = rows
+    self._dirty_groups.clear()
+
+    for rule in self._dirty_rules:
+      words = self._rule_words[rule]
+      total_occ = sum(phone_occurrences[word] for word in words)
+      rule_str = rule_to_str(rule, positions=None)
+      rows = [
+        get_rule_stats_entry(0, rule_str, word, self._rules_strs[word], phone_occurrences[word], total_occ)
+        for word in words
+      ]
+      rows.sort(key=get_rule_stats_sort_key)
+      self._rule_rows[rule] = rows
+    self._dirty_rules.clear()
+
+  def get_word_stats(self) -> List[WordStatsEntry]:
+    self._update()
+    res = []
+    for nr, group in enumerate(self._groups, start=1):
+      res.extend((nr,) + row[1:] for row in self._group_rows[group])
+    return res
+
+  def get_rule_stats(self) -> List[RuleStatsEntry]:
+    self._update()
+    res = []
+    for nr, (_, rule_index) in enumerate(self._rule_sort_keys, start=1):
+      rule = self._rules[rule_index]
+      res.extend((nr,) + row[1:] for row in self._rule_rows.get(rule, ()))
+    return res
@@ -0,0 +1,182 @@
+import os
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import wraps
+from threading import Lock, get_ident
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+try:
+  import resource
+except ImportError:
+  resource = None
+
+PROFILE_ENV_VAR = "ACCENT_ANALYSER_PROFILE"
+# tracemalloc.reset_peak exists since Python 3.9; without it the peak of a stage cannot be told apart from earlier peaks
+_CAN_RESET_PEAK = hasattr(tracemalloc, "reset_peak")
+
+F = TypeVar("F", bound=Callable)
+ProfileRow = Tuple[str, int, float, int, Optional[int]]
+
+PROFILE_COLUMNS = [
+  ("Stage", str),
+  ("Calls", int),
+  ("Wall time (s)", float),
+  ("Peak RSS delta (bytes)", int),
+  ("Traced peak (bytes)", int),
+]
+
+
+@dataclass()
+class StageStats():
+  calls: int = 0
+  wall_time: float = 0.0
+  peak_rss_delta: int = 0
+  # None if memory was not traced or every call overlapped a stage of another thread
+  traced_peak: Optional[int] = None
+
+
+@dataclass()
+class _Frame():
+  thread_id: int
+  traced_start: int
+  traced_peak: int
+  overlapped: bool = False
+
+
+_enabled = False
+_trace_memory = False
+_stats: Dict[str, StageStats] = {}
+_lock = Lock()
+# traced stages of all threads that have not finished yet
+_active_frames: List[_Frame] = []
+
+
+def is_enabled() -> bool:
+  return _enabled
+
+
+def is_requested_by_env() -> bool:
+  return os.environ.get(PROFILE_ENV_VAR, "") not in ("", "0")
+
+
+def enable(trace_memory: bool = True) -> None:
+  '''trace_memory starts tracemalloc, which slows down allocations considerably; it is ignored before Python 3.9. The peak RSS is recorded in any case.'''
+  global _enabled, _trace_memory
+  _enabled = True
+  trace_memory = trace_memory and _CAN_RESET_PEAK
+  _trace_memory = trace_memory
+  if trace_memory and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def disable() -> None:
+  global _enabled, _trace_memory
+  _enabled = False
+  if _trace_memory and tracemalloc.is_tracing():
+    tracemalloc.stop()
+  _trace_memory = False
+
+
+def reset() -> None:
+  with _lock:
+    _stats.clear()
+
+
+def get_max_rss() -> int:
+  if resource is None:
+    return 0
+  res = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  # Linux reports KiB, macOS bytes
+  if sys.platform != "darwin":
+    res *= 1024
+  return res
+
+
+def _update_active_peaks() -> None:
+  '''Must be called with _lock held before the tracemalloc peak is reset, so that no active stage loses the peak reached so far.'''
+  peak = tracemalloc.get_traced_memory()[1]
+  for frame in _active_frames:
+    frame.traced_peak = max(frame.traced_peak, peak)
+
+
+def _enter_traced() -> _Frame:
+  thread_id = get_ident()
+  with _lock:
+    _update_active_peaks()
+    tracemalloc.reset_peak()
+    current = tracemalloc.get_traced_memory()[0]
+    frame = _Frame(thread_id=thread_id, traced_start=current, traced_peak=current)
+    for other in _active_frames:
+      if other.thread_id != thread_id:
+        other.overlapped = True
+        frame.overlapped = True
+    _active_frames.append(frame)
+  return frame
+
+
+def _exit_traced(frame: _Frame) -> Optional[int]:
+  with _lock:
+    _update_active_peaks()
+    _active_frames.remove(frame)
+  if frame.overlapped:
+    return None
+  return frame.traced_peak - frame.traced_start
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+  '''Records wall time, calls and memory of the enclosed block under name if instrumentation is enabled. Stages can be nested; the traced peak of a stage includes its inner stages. tracemalloc cannot tell threads apart, so no traced peak is recorded for a call that overlaps a stage running in another thread. The peak RSS is process-wide in any case, and work done in worker processes is not recorded.'''
+  if not _enabled:
+    yield
+    return
+
+  frame = None
+  if _trace_memory and tracemalloc.is_tracing():
+    frame = _enter_traced()
+  rss_start = get_max_rss()
+  start = perf_counter()
+  try:
+    yield
+  finally:
+    wall_time = perf_counter() - start
+    peak_rss_delta = get_max_rss() - rss_start
+    traced_peak = None if frame is None else _exit_traced(frame)
+    with _lock:
+      stats = _stats.setdefault(name, StageStats())
+      stats.calls += 1
+      stats.wall_time += wall_time
+      stats.peak_rss_delta = max(stats.peak_rss_delta, peak_rss_delta)
+      if traced_peak is not None:
+        stats.traced_peak = max(stats.traced_peak or 0, traced_peak)
+
+
+def instrumented(name: str) -> Callable[[F], F]:
+  '''Decorator that records each call as stage name. While instrumentation is disabled the only overhead is one flag check per call.'''
+  def decorator(func: F) -> F:
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+      if not _enabled:
+        return func(*args, **kwargs)
+      with stage(name):
+        return func(*args, **kwargs)
+    return wrapper
+  return decorator
+
+
+def get_stage_stats(name: str) -> Optional[StageStats]:
+  with _lock:
+    stats = _stats.get(name)
+    return None if stats is None else StageStats(**vars(stats))
+
+
+def get_profile_rows() -> List[ProfileRow]:
+  '''Rows in the order in which the stages first finished.'''
+  with _lock:
+    res = [
+      (name, stats.calls, stats.wall_time, stats.peak_rss_delta, stats.traced_peak)
+      for name, stats in _stats.items()
+    ]
+  return res
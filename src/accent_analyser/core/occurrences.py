@@ -0,0 +1,51 @@
+from collections import Counter
+from typing import Iterable
+
+from accent_analyser.core.rule_detection import (PhonemeOccurrences,
+                                                 PhoneOccurrences, WordEntry)
+
+
+class Occurrences():
+  '''Counts phone and phoneme occurrences together; batches of words can be added and removed again.'''
+
+  def __init__(self, words: Iterable[WordEntry] = ()) -> None:
+    self.phone_occurrences: PhoneOccurrences = Counter()
+    self.phoneme_occurrences: PhonemeOccurrences = Counter()
+    self.add(words)
+
+  def __len__(self) -> int:
+    return len(self.phone_occurrences)
+
+  @property
+  def total(self) -> int:
+    return sum(self.phone_occurrences.values())
+
+  def add(self, words: Iterable[WordEntry]) -> None:
+    batch = Counter(words)
+    self.phone_occurrences.update(batch)
+    for word, count in batch.items():
+      self.phoneme_occurrences[(word.graphemes, word.phonemes)] += count
+
+  def add_count(self, word: WordEntry, count: int) -> None:
+    assert count > 0
+    self.phone_occurrences[word] += count
+    self.phoneme_occurrences[(word.graphemes, word.phonemes)] += count
+
+  def remove(self, words: Iterable[WordEntry]) -> None:
+    batch = Counter(words)
+    for word, count in batch.items():
+      assert self.phone_occurrences.get(word, 0) >= count
+      decrease_count(self.phone_occurrences, word, count)
+      decrease_count(self.phoneme_occurrences, (word.graphemes, word.phonemes), count)
+
+  def update(self, other: "Occurrences") -> None:
+    self.phone_occurrences.update(other.phone_occurrences)
+    self.phoneme_occurrences.update(other.phoneme_occurrences)
+
+
+def decrease_count(counter: Counter, key, count: int) -> None:
+  new_count = counter[key] - count
+  if new_count == 0:
+    del counter[key]
+  else:
+    counter[key] = new_count
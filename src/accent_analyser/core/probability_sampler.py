@@ -0,0 +1,96 @@
+from random import Random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from accent_analyser.core.word_probabilities import ProbabilitiesDict, Symbols
+
+
+class ProbabilitySampler():
+  '''Samples replacements like replace_with_prob from alias tables that are built once, so each draw takes constant time. The alias tables of all phoneme sequences are stored in flat arrays.'''
+
+  def __init__(self, probabilities: ProbabilitiesDict, seed: Optional[int] = None) -> None:
+    self._key_ids: Dict[Symbols, int] = {}
+    self._outcomes: List[Symbols] = []
+    offsets = []
+    counts = []
+    thresholds = []
+    aliases = []
+    for symbols, entries in probabilities.items():
+      assert len(entries) > 0
+      self._key_ids[symbols] = len(offsets)
+      offset = len(self._outcomes)
+      offsets.append(offset)
+      counts.append(len(entries))
+      key_thresholds, key_aliases = get_alias_table([weight for _, weight in entries])
+      thresholds.extend(key_thresholds)
+      aliases.extend(offset + alias for alias in key_aliases)
+      self._outcomes.extend(replace_with for replace_with, _ in entries)
+
+    self._offsets = offsets
+    self._counts = counts
+    self._thresholds = thresholds
+    self._aliases = aliases
+    self._offsets_array = np.array(offsets, dtype=np.int64)
+    self._counts_array = np.array(counts, dtype=np.int64)
+    self._thresholds_array = np.array(thresholds, dtype=np.float64)
+    self._aliases_array = np.array(aliases, dtype=np.int64)
+    self.seed(seed)
+
+  def __contains__(self, symbols: Symbols) -> bool:
+    return symbols in self._key_ids
+
+  def __len__(self) -> int:
+    return len(self._key_ids)
+
+  def seed(self, seed: Optional[int]) -> None:
+    self._random = Random(seed)
+    self._rng = np.random.default_rng(seed)
+
+  def sample(self, symbols: Symbols) -> Symbols:
+    key_id = self._key_ids[symbols]
+    count = self._counts[key_id]
+    position = self._random.random() * count
+    column = int(position)
+    index = self._offsets[key_id] + column
+    if position - column >= self._thresholds[index]:
+      index = self._aliases[index]
+    return self._outcomes[index]
+
+  def sample_many(self, symbols: Iterable[Symbols]) -> List[Symbols]:
+    '''Draws one replacement for each of the given phoneme sequences at once.'''
+    key_ids = np.fromiter((self._key_ids[x] for x in symbols), dtype=np.int64)
+    indices = self.sample_indices(key_ids)
+    res = [self._outcomes[index] for index in indices]
+    return res
+
+  def sample_indices(self, key_ids: np.ndarray) -> np.ndarray:
+    positions = self._rng.random(len(key_ids)) * self._counts_array[key_ids]
+    columns = positions.astype(np.int64)
+    indices = self._offsets_array[key_ids] + columns
+    use_alias = (positions - columns) >= self._thresholds_array[indices]
+    res = np.where(use_alias, self._aliases_array[indices], indices)
+    return res
+
+
+def get_alias_table(weights: List[int]) -> Tuple[List[float], List[int]]:
+  '''Vose's alias method: column i returns i if the uniform fraction is below thresholds[i] and aliases[i] otherwise.'''
+  count = len(weights)
+  total = sum(weights)
+  assert total > 0
+  scaled = [weight * count / total for weight in weights]
+  thresholds = [1.0] * count
+  aliases = list(range(count))
+  small = [i for i, x in enumerate(scaled) if x < 1.0]
+  large = [i for i, x in enumerate(scaled) if x >= 1.0]
+  while len(small) > 0 and len(large) > 0:
+    less = small.pop()
+    more = large.pop()
+    thresholds[less] = scaled[less]
+    aliases[less] = more
+    scaled[more] = scaled[more] + scaled[less] - 1.0
+    if scaled[more] < 1.0:
+      small.append(more)
+    else:
+      large.append(more)
+  # remaining columns are full apart from rounding errors
+  return thresholds, aliases
@@ -1,14 +1,20 @@
-from collections import OrderedDict
+import pickle
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from difflib import ndiff
 from enum import IntEnum
 from logging import getLogger
-from typing import List, Optional
+from multiprocessing import get_context
+from typing import Dict, Iterable, List, Optional
 from typing import OrderedDict as OrderedDictType
 from typing import Tuple
 
+from accent_analyser.core.alignment import ADD_TAG, EQUAL_TAG, get_diff_lines
+from accent_analyser.core.instrumentation import instrumented
+from accent_analyser.core.rules_store import RulesStore
+from accent_analyser.core.symbol_table import SymbolTable
 from ordered_set import OrderedSet
-from pandas import DataFrame
+from pandas import DataFrame, Series, factorize
 from text_utils import (Language, SymbolFormat, Symbols, get_lang_from_str,
                         text_to_symbols)
 from text_utils.language import is_lang_from_str_supported
@@ -18,6 +24,12 @@ PROB_PRECISION_DECIMALS = 6
 # TODO: remove space symbol
 STRIP_SYMBOLS = list(".?!,;-: ")
 UNCHANGED_RULE = "Unchanged"
+DEFAULT_RULES_CACHE_SIZE = 1000000
+DEFAULT_CHUNKSIZE = 1000
+# below this number of words the startup of the process pool takes longer than the extraction
+DEFAULT_MIN_PARALLEL_SIZE = 10000
+# increase if the detected rules change to invalidate persisted rules
+RULE_DETECTION_VERSION = "1"
 
 Graphemes = Symbols
 Phonemes = Symbols
@@ -45,12 +57,17 @@ class ChangeType(IntEnum):
   REMOVE = 1
 
 
-@dataclass()
+@dataclass(frozen=True)
 class WordEntry:
+  __slots__ = ("graphemes", "phonemes", "phones", "_hash")
   graphemes: Graphemes
   phonemes: Phonemes
   phones: Phones
 
+  def __post_init__(self) -> None:
+    # frozen, so the cached hash cannot become stale
+    object.__setattr__(self, "_hash", hash((self.graphemes, self.phonemes, self.phones)))
+
   @property
   def graphemes_str(self) -> str:
     return ''.join(self.graphemes)
@@ -68,15 +85,24 @@ class WordEntry:
     return len(self.graphemes) == len(self.phonemes) == len(self.phones) == 0
 
   def __hash__(self) -> int:
-    return hash((self.graphemes, self.phonemes, self.phones))
+    return self._hash
 
+  def __reduce__(self):
+    # the cached hash is not valid in other processes
+    return (WordEntry, (self.graphemes, self.phonemes, self.phones))
 
-@dataclass()
+
+@dataclass(frozen=True)
 class Rule():
+  __slots__ = ("rule_type", "from_symbols", "to_symbols", "_hash")
   rule_type: RuleType
   from_symbols: Symbols
   to_symbols: Symbols
 
+  def __post_init__(self) -> None:
+    # frozen, so the cached hash cannot become stale
+    object.__setattr__(self, "_hash", hash((self.from_symbols, self.to_symbols, self.rule_type)))
+
   @property
   def from_str(self) -> str:
     return ''.join(self.from_symbols)
@@ -86,7 +112,11 @@ class Rule():
     return ''.join(self.to_symbols)
 
   def __hash__(self) -> int:
-    return hash((self.from_symbols, self.to_symbols, self.rule_type))
+    return self._hash
+
+  def __reduce__(self):
+    # the cached hash is not valid in other processes
+    return (Rule, (self.rule_type, self.from_symbols, self.to_symbols))
 
 
 WordRules = OrderedDictType[Positions, Rule]
@@ -141,17 +171,11 @@ class Change():
   change_type: ChangeType
 
 
+@instrumented("ingestion")
 def df_to_data(data: DataFrame) -> List[WordEntry]:
   res = []
-  logger = getLogger(__name__)
   for _, row in data.iterrows():
-    row_lang = row["lang"]
-    valid_lang = is_lang_from_str_supported(row_lang)
-    if not valid_lang:
-      logger.error(f"Language {row_lang} is not supported!")
-    lang = get_lang_from_str(row_lang)
-    if lang != Language.ENG:
-      logger.error(f"Language {row_lang} is not supported!")
+    check_lang_is_supported(row["lang"])
     graphemes = text_to_symbols(
       str(row["graphemes"]), text_format=SymbolFormat.GRAPHEMES, lang=Language.ENG)
     phonemes = text_to_symbols(
@@ -175,23 +199,74 @@ def df_to_data(data: DataFrame) -> List[WordEntry]:
   return res
 
 
+def check_lang_is_supported(row_lang: str) -> None:
+  logger = getLogger(__name__)
+  valid_lang = is_lang_from_str_supported(row_lang)
+  if not valid_lang:
+    logger.error(f"Language {row_lang} is not supported!")
+  lang = get_lang_from_str(row_lang)
+  if lang != Language.ENG:
+    logger.error(f"Language {row_lang} is not supported!")
+
+
+def column_to_symbols(column: Series, text_format: SymbolFormat, lower: bool, symbol_table: Optional[SymbolTable] = None) -> List[Symbols]:
+  codes, uniques = factorize(column.astype(str))
+  unique_symbols = []
+  for text in uniques:
+    symbols = text_to_symbols(text, text_format=text_format, lang=Language.ENG)
+    if lower:
+      symbols = symbols_to_lower(symbols)
+    symbols = tuple(symbols_strip(symbols, strip=STRIP_SYMBOLS))
+    if symbol_table is not None:
+      symbols = symbol_table.intern(symbols)
+    unique_symbols.append(symbols)
+  res = [unique_symbols[code] for code in codes]
+  return res
+
+
+@instrumented("ingestion")
+def df_to_data_columnar(data: DataFrame, symbol_table: Optional[SymbolTable] = None) -> List[WordEntry]:
+  for row_lang in data["lang"].unique():
+    check_lang_is_supported(row_lang)
+
+  all_graphemes = column_to_symbols(
+    data["graphemes"], SymbolFormat.GRAPHEMES, lower=True, symbol_table=symbol_table)
+  all_phonemes = column_to_symbols(
+    data["phonemes"], SymbolFormat.PHONEMES_IPA, lower=False, symbol_table=symbol_table)
+  all_phones = column_to_symbols(
+    data["phones"], SymbolFormat.PHONES_IPA, lower=False, symbol_table=symbol_table)
+
+  res = []
+  for graphemes, phonemes, phones in zip(all_graphemes, all_phonemes, all_phones):
+    entry = WordEntry(
+      graphemes=graphemes,
+      phonemes=phonemes,
+      phones=phones,
+    )
+
+    if not entry.is_empty:
+      res.append(entry)
+
+  return res
+
+
+@instrumented("diffing")
 def get_changes(l1: List[str], l2: List[str]) -> OrderedDictType[int, Change]:
-  res = ndiff(l1, l2)
+  res = get_diff_lines(l1, l2)
   result: OrderedDictType[int, Change] = OrderedDict()
-  for change_pos, change in enumerate(res):
-    change_type = change[:2]
-    change_value = change[2:]
-    if change_type == "  ":
+  for change_pos, (change_type, change_value) in enumerate(res):
+    if change_type == EQUAL_TAG:
       continue
     else:
       change = Change(
         change=change_value,
-        change_type=ChangeType.ADD if change_type == "+ " else ChangeType.REMOVE,
+        change_type=ChangeType.ADD if change_type == ADD_TAG else ChangeType.REMOVE,
       )
       result[change_pos] = change
   return result
 
 
+@instrumented("change_clustering")
 def cluster_changes(changes: OrderedDictType[int, Change]) -> List[OrderedDictType[int, Change]]:
   if len(changes) == 0:
     return []
@@ -284,32 +359,172 @@ def clustered_changes_to_rules(clustered_changes: List[OrderedDictType[int, Chan
   return rules
 
 
-def get_phone_occurrences(words: List[WordEntry]) -> PhoneOccurrences:
+def add_phone_occurrences(phone_occurrences: PhoneOccurrences, words: Iterable[WordEntry]) -> None:
+  for w, count in Counter(words).items():
+    phone_occurrences[w] = phone_occurrences.get(w, 0) + count
+
+
+def get_phone_occurrences(words: Iterable[WordEntry]) -> PhoneOccurrences:
   words_dict: PhoneOccurrences = OrderedDict()
-  for w in words:
-    if w not in words_dict:
-      words_dict[w] = 0
-    words_dict[w] += 1
+  add_phone_occurrences(words_dict, words)
   return words_dict
 
 
-def get_phoneme_occurrences(words: List[WordEntry]) -> PhonemeOccurrences:
-  result: PhonemeOccurrences = OrderedDict()
+def add_phoneme_occurrences(phoneme_occurrences: PhonemeOccurrences, words: Iterable[WordEntry]) -> None:
   for word_combi in words:
     k = (word_combi.graphemes, word_combi.phonemes)
-    if k not in result:
-      result[k] = 0
-    result[k] += 1
+    if k not in phoneme_occurrences:
+      phoneme_occurrences[k] = 0
+    phoneme_occurrences[k] += 1
+
+
+def get_phoneme_occurrences(words: Iterable[WordEntry]) -> PhonemeOccurrences:
+  result: PhonemeOccurrences = OrderedDict()
+  add_phoneme_occurrences(result, words)
   return result
 
 
-def get_rules_from_words(words: OrderedSet[WordEntry]) -> OrderedDictType[WordEntry, WordRules]:
+def get_word_rules(phonemes: Phonemes, phones: Phones) -> WordRules:
+  changes = get_changes(phonemes, phones)
+  clustered_changes = cluster_changes(changes)
+  rules = clustered_changes_to_rules(clustered_changes)
+  return rules
+
+
+def get_rules_store_key(phonemes: Phonemes, phones: Phones) -> str:
+  symbols = "\x1f".join(phonemes + phones)
+  return f"{len(phonemes)}\x1e{symbols}"
+
+
+def word_rules_to_bytes(rules: WordRules) -> bytes:
+  data = tuple(
+    (positions, int(rule.rule_type), rule.from_symbols, rule.to_symbols)
+    for positions, rule in rules.items()
+  )
+  return pickle.dumps(data, protocol=4)
+
+
+def word_rules_from_bytes(value: bytes) -> WordRules:
+  rules: WordRules = OrderedDict()
+  for positions, rule_type, from_symbols, to_symbols in pickle.loads(value):
+    rules[positions] = Rule(
+      rule_type=RuleType(rule_type),
+      from_symbols=from_symbols,
+      to_symbols=to_symbols,
+    )
+  return rules
+
+
+class RulesCache():
+  '''LRU cache for the rules of (phonemes, phones) pairs; the cached rules are shared and must not be modified. Misses are looked up in the optional store before they are computed.'''
+
+  def __init__(self, max_size: Optional[int] = DEFAULT_RULES_CACHE_SIZE, store: Optional[RulesStore] = None) -> None:
+    assert max_size is None or max_size > 0
+    self.max_size = max_size
+    self.store = store
+    self.hits = 0
+    self.misses = 0
+    self.store_hits = 0
+    self._entries: OrderedDictType[Tuple[Phonemes, Phones], WordRules] = OrderedDict()
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+  def get_word_rules(self, phonemes: Phonemes, phones: Phones) -> WordRules:
+    key = (phonemes, phones)
+    rules = self._entries.get(key)
+    if rules is not None:
+      self.hits += 1
+      self._entries.move_to_end(key)
+      return rules
+
+    self.misses += 1
+    rules = self._load(key)
+    if rules is None:
+      rules = get_word_rules(phonemes, phones)
+      self._save(key, rules)
+    self._insert(key, rules)
+    return rules
+
+  def get_missing(self, pairs: Iterable[Tuple[Phonemes, Phones]]) -> List[Tuple[Phonemes, Phones]]:
+    '''Returns the distinct pairs whose rules are neither cached nor stored; stored ones are cached. Only the pairs that are not cached are looked up in the store, in batches.'''
+    uncached = [key for key in dict.fromkeys(pairs) if key not in self._entries]
+    if self.store is None:
+      return uncached
+    store_keys = [get_rules_store_key(*key) for key in uncached]
+    stored = self.store.get_many(store_keys)
+    missing = []
+    for key, store_key in zip(uncached, store_keys):
+      value = stored.get(store_key)
+      if value is None:
+        missing.append(key)
+      else:
+        self.store_hits += 1
+        self._insert(key, word_rules_from_bytes(value))
+    return missing
+
+  def add(self, phonemes: Phonemes, phones: Phones, rules: WordRules) -> None:
+    key = (phonemes, phones)
+    self._save(key, rules)
+    self._insert(key, rules)
+
+  def commit(self) -> None:
+    if self.store is not None:
+      self.store.commit()
+
+  def _insert(self, key: Tuple[Phonemes, Phones], rules: WordRules) -> None:
+    self._entries[key] = rules
+    if self.max_size is not None and len(self._entries) > self.max_size:
+      self._entries.popitem(last=False)
+
+  def _load(self, key: Tuple[Phonemes, Phones]) -> Optional[WordRules]:
+    if self.store is None:
+      return None
+    value = self.store.get(get_rules_store_key(*key))
+    if value is None:
+      return None
+    self.store_hits += 1
+    return word_rules_from_bytes(value)
+
+  def _save(self, key: Tuple[Phonemes, Phones], rules: WordRules) -> None:
+    if self.store is not None:
+      self.store.put(get_rules_store_key(*key), word_rules_to_bytes(rules))
+
+
+def get_word_rules_of_pair(pair: Tuple[Phonemes, Phones]) -> WordRules:
+  return get_word_rules(*pair)
+
+
+def get_word_rules_parallel(pairs: List[Tuple[Phonemes, Phones]], n_jobs: int, chunksize: int = DEFAULT_CHUNKSIZE) -> List[WordRules]:
+  assert n_jobs > 0
+  assert chunksize > 0
+  # callers may run other threads meanwhile, which a forked worker could deadlock on; spawned workers also start with disabled instrumentation
+  with ProcessPoolExecutor(max_workers=n_jobs, mp_context=get_context("spawn")) as executor:
+    res = list(executor.map(get_word_rules_of_pair, pairs, chunksize=chunksize))
+  return res
+
+
+@instrumented("rule_detection")
+def get_rules_from_words(words: OrderedSet[WordEntry], cache: Optional[RulesCache] = None, n_jobs: int = 1, chunksize: int = DEFAULT_CHUNKSIZE, min_parallel_size: int = DEFAULT_MIN_PARALLEL_SIZE) -> OrderedDictType[WordEntry, WordRules]:
+  if cache is None:
+    cache = RulesCache()
+
+  computed: Dict[Tuple[Phonemes, Phones], WordRules] = {}
+  if n_jobs > 1:
+    missing = cache.get_missing((word.phonemes, word.phones) for word in words)
+    if len(missing) >= min_parallel_size:
+      missing_rules = get_word_rules_parallel(missing, n_jobs, chunksize)
+      for (phonemes, phones), rules in zip(missing, missing_rules):
+        cache.add(phonemes, phones, rules)
+        computed[(phonemes, phones)] = rules
+
   rules_dict: OrderedDictType[WordEntry, WordRules] = OrderedDict()
   for word in words:
-    changes = get_changes(word.phonemes, word.phones)
-    clustered_changes = cluster_changes(changes)
-    rules = clustered_changes_to_rules(clustered_changes)
+    rules = computed.get((word.phonemes, word.phones))
+    if rules is None:
+      rules = cache.get_word_rules(word.phonemes, word.phones)
     rules_dict[word] = rules
+  cache.commit()
   return rules_dict
 
 
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from random import Random
+from typing import Dict, List, Optional
+from typing import OrderedDict as OrderedDictType
+from typing import Tuple
+
+from accent_analyser.core.rule_detection import (PhonemeOccurrences,
+                                                 PhoneOccurrences, Rule,
+                                                 RuleType, WordEntry,
+                                                 WordRules)
+from accent_analyser.core.rule_stats import (get_rule_occurrences,
+                                             word_rules_to_rules_dict)
+from accent_analyser.core.symbol_automaton import SymbolAutomaton
+from accent_analyser.core.word_probabilities import Symbols
+
+
+def get_rule_probabilities(word_rules: OrderedDictType[WordEntry, WordRules], phone_occurrences: PhoneOccurrences, phoneme_occurrences: PhonemeOccurrences) -> OrderedDictType[Rule, float]:
+  '''Probability of each omission and substitution: its occurrences divided by the occurrences of its from_symbols in all phonemes. Insertions have no from_symbols to anchor them and are left out.'''
+  rule_occurrences = get_rule_occurrences(word_rules_to_rules_dict(word_rules), phone_occurrences)
+  rules = [
+    rule for rule in rule_occurrences
+    if rule is not None and rule.rule_type != RuleType.INSERTION
+  ]
+  automaton = SymbolAutomaton(dict.fromkeys(rule.from_symbols for rule in rules))
+  pattern_occurrences = [0] * len(automaton)
+  for (_, phonemes), count in phoneme_occurrences.items():
+    for pattern_id, matches_count in automaton.count_matches(phonemes).items():
+      pattern_occurrences[pattern_id] += matches_count * count
+  pattern_ids = {pattern: pattern_id for pattern_id, pattern in enumerate(automaton.patterns)}
+
+  res: OrderedDictType[Rule, float] = OrderedDict()
+  for rule in rules:
+    total = pattern_occurrences[pattern_ids[rule.from_symbols]]
+    if total > 0:
+      res[rule] = min(rule_occurrences[rule] / total, 1.0)
+  return res
+
+
+class RuleSampler():
+  '''Applies omissions and substitutions with their probabilities to any phoneme sequence, also to words that were never seen. The input is scanned once with an automaton over all from_symbols; matches are visited left to right and longer ones first, and a match that overlaps an applied rule is skipped.'''
+
+  def __init__(self, rule_probabilities: Dict[Rule, float], seed: Optional[int] = None) -> None:
+    choices: OrderedDictType[Symbols, List[Tuple[float, Symbols]]] = OrderedDict()
+    for rule, probability in rule_probabilities.items():
+      assert rule.rule_type != RuleType.INSERTION
+      assert 0 <= probability <= 1
+      choices.setdefault(rule.from_symbols, []).append((probability, rule.to_symbols))
+
+    self._automaton = SymbolAutomaton(choices.keys())
+    self._cumulative_probabilities: List[List[float]] = []
+    self._replacements: List[List[Symbols]] = []
+    for pattern_choices in choices.values():
+      total = sum(probability for probability, _ in pattern_choices)
+      # rules with the same from_symbols exclude each other
+      scale = 1 / total if total > 1 else 1
+      cumulative = []
+      current = 0.0
+      for probability, _ in pattern_choices:
+        current += probability * scale
+        cumulative.append(current)
+      self._cumulative_probabilities.append(cumulative)
+      self._replacements.append([to_symbols for _, to_symbols in pattern_choices])
+    self.seed(seed)
+
+  def seed(self, seed: Optional[int]) -> None:
+    self._random = Random(seed)
+
+  def sample(self, phonemes: Symbols) -> Symbols:
+    matches = sorted(self._automaton.iter_matches(phonemes), key=lambda x: (x[0], -x[1]))
+    res = []
+    last_end = 0
+    for start, end, pattern_id in matches:
+      if start < last_end:
+        continue
+      replacement = self._sample_replacement(pattern_id)
+      if replacement is None:
+        continue
+      res.extend(phonemes[last_end:start])
+      res.extend(replacement)
+      last_end = end
+    res.extend(phonemes[last_end:])
+    return tuple(res)
+
+  def _sample_replacement(self, pattern_id: int) -> Optional[Symbols]:
+    value = self._random.random()
+    for cumulative, replacement in zip(self._cumulative_probabilities[pattern_id], self._replacements[pattern_id]):
+      if value < cumulative:
+        return replacement
+    return None
@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from accent_analyser.core.rule_detection import STRIP_SYMBOLS, Rule, RuleType
+from accent_analyser.core.symbol_automaton import SymbolAutomaton
+from accent_analyser.core.word_probabilities import Symbols
+
+WORD_BOUNDARY_SYMBOLS = frozenset(STRIP_SYMBOLS)
+
+
+@dataclass(frozen=True)
+class RewriteRule():
+  from_symbols: Symbols
+  to_symbols: Symbols
+  word_initial: bool = False
+  word_final: bool = False
+
+
+def get_rewrite_rules(rules: Iterable[Rule]) -> List[RewriteRule]:
+  '''Converts detected omissions and substitutions; insertions have no from_symbols and are skipped.'''
+  res = [
+    RewriteRule(from_symbols=rule.from_symbols, to_symbols=rule.to_symbols)
+    for rule in rules
+    if rule is not None and rule.rule_type != RuleType.INSERTION
+  ]
+  return res
+
+
+class RuleSet():
+  '''Applies all rewrite rules in one left-to-right scan over one automaton of all from_symbols. On overlapping matches the leftmost one wins, then the longest and then the one listed first. Replaced symbols are not rewritten again.'''
+
+  def __init__(self, rules: Iterable[RewriteRule]) -> None:
+    self.rules = list(rules)
+    pattern_ids = {}
+    self._pattern_rules: List[List[int]] = []
+    for rule_index, rule in enumerate(self.rules):
+      pattern_id = pattern_ids.setdefault(rule.from_symbols, len(pattern_ids))
+      if pattern_id == len(self._pattern_rules):
+        self._pattern_rules.append([])
+      self._pattern_rules[pattern_id].append(rule_index)
+    self._automaton = SymbolAutomaton(pattern_ids.keys())
+    # rule that always wins for a pattern because it is listed first and is not anchored
+    self._unanchored_rules: List[Optional[int]] = []
+    for rule_indices in self._pattern_rules:
+      first_rule = self.rules[rule_indices[0]]
+      is_anchored = first_rule.word_initial or first_rule.word_final
+      self._unanchored_rules.append(None if is_anchored else rule_indices[0])
+
+  def __len__(self) -> int:
+    return len(self.rules)
+
+  def apply(self, symbols: Symbols) -> Symbols:
+    '''Words are delimited by the start and end of symbols and by WORD_BOUNDARY_SYMBOLS, which matters only for anchored rules.'''
+    best: Dict[int, Tuple[int, int]] = {}
+    unanchored_rules = self._unanchored_rules
+    for start, end, pattern_id in self._automaton.iter_matches(symbols):
+      rule_index = unanchored_rules[pattern_id]
+      if rule_index is None:
+        rule_index = self._get_matching_rule(symbols, start, end, pattern_id)
+        if rule_index is None:
+          continue
+      current = best.get(start)
+      if current is None or end > current[0] or (end == current[0] and rule_index < current[1]):
+        best[start] = (end, rule_index)
+    if len(best) == 0:
+      return symbols
+
+    res = []
+    position = 0
+    for start in sorted(best):
+      if start < position:
+        continue
+      end, rule_index = best[start]
+      res.extend(symbols[position:start])
+      res.extend(self.rules[rule_index].to_symbols)
+      position = end
+    res.extend(symbols[position:])
+    return tuple(res)
+
+  def _get_matching_rule(self, symbols: Symbols, start: int, end: int, pattern_id: int) -> Optional[int]:
+    is_word_initial = start == 0 or symbols[start - 1] in WORD_BOUNDARY_SYMBOLS
+    is_word_final = end == len(symbols) or symbols[end] in WORD_BOUNDARY_SYMBOLS
+    for rule_index in self._pattern_rules[pattern_id]:
+      rule = self.rules[rule_index]
+      if rule.word_initial and not is_word_initial:
+        continue
+      if rule.word_final and not is_word_final:
+        continue
+      return rule_index
+    return None
@@ -1,7 +1,7 @@
 from collections import OrderedDict
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 from typing import OrderedDict as OrderedDictType
-from typing import Set, Tuple
+from typing import Tuple, Union
 
 from accent_analyser.core.rule_detection import (PhoneOccurrences, Rule,
                                                  RuleType, WordEntry,
@@ -10,23 +10,35 @@ from accent_analyser.core.rule_detection import (PhoneOccurrences, Rule,
 from pandas import DataFrame
 
 RuleStatsEntry = Tuple[str, str, str, str, int, int, str]
+RuleStatsRow = Tuple[int, str, str, str, str, str, int, int, float]
+
+RULE_STATS_COLUMNS = [
+  ("Nr", int),
+  ("Rule", str),
+  ("English", str),
+  ("Phonemes", str),
+  ("Phones", str),
+  ("All Rules", str),
+  ("Occurrences", int),
+  ("Occurrences Total", int),
+  ("Occurrences (%)", float),
+]
 
 
 def word_rules_to_rules_dict(word_rules: OrderedDictType[WordEntry, WordRules]) -> OrderedDictType[Rule, List[WordEntry]]:
-  all_rules: Set[Rule] = {x for y in word_rules.values() for x in y.values()}
+  '''Inverted index rule -> words; words without rules are listed under None.'''
   words_to_rules: OrderedDictType[Rule, List[WordEntry]] = OrderedDict()
 
   words_to_rules[None] = []
   for word, rules in word_rules.items():
     if len(rules) == 0:
       words_to_rules[None].append(word)
+      continue
 
-  for rule in all_rules:
-    for word, rules in word_rules.items():
-      if rule in rules.values():
-        if rule not in words_to_rules:
-          words_to_rules[rule] = []
-        words_to_rules[rule].append(word)
+    for rule in dict.fromkeys(rules.values()):
+      if rule not in words_to_rules:
+        words_to_rules[rule] = []
+      words_to_rules[rule].append(word)
 
   return words_to_rules
 
@@ -77,37 +89,70 @@ def get_rule_stats(word_rules: OrderedDictType[WordEntry, WordRules], phone_occu
     for word in words:
       # total_word_occ = phoneme_occurrences[(word.graphemes, word.phonemes)]
       phone_occ = phone_occurrences[word]
-      rules = word_rules[word]
-      occurrence_percent = phone_occ / total_occ * 100
-      rules_str = rules_to_str(rules)
-
-      res.append((
-        rule_id_one_based,
-        rule_str,
-        word.graphemes_str,
-        word.phonemes_str,
-        word.phones_str,
-        rules_str,
-        phone_occ,
-        total_occ,
-        f"{occurrence_percent:.2f}",
-      ))
+      rules_str = rules_to_str(word_rules[word])
+      res.append(get_rule_stats_entry(rule_id_one_based, rule_str, word, rules_str, phone_occ, total_occ))
 
   sort_rule_stats(res)
 
   return res
 
 
+def get_rule_stats_entry(nr: int, rule_str: str, word: WordEntry, rules_str: str, phone_occ: int, total_occ: int) -> RuleStatsEntry:
+  row = get_rule_stats_row(nr, rule_str, word, rules_str, phone_occ, total_occ)
+  res = row[:-1] + (f"{row[-1]:.2f}",)
+  return res
+
+
+def get_rule_stats_row(nr: int, rule_str: str, word: WordEntry, rules_str: str, phone_occ: int, total_occ: int) -> RuleStatsRow:
+  occurrence_percent = phone_occ / total_occ * 100
+  res = (
+    nr,
+    rule_str,
+    word.graphemes_str,
+    word.phonemes_str,
+    word.phones_str,
+    rules_str,
+    phone_occ,
+    total_occ,
+    occurrence_percent,
+  )
+  return res
+
+
+def iter_rule_stats(word_rules: OrderedDictType[WordEntry, WordRules], phone_occurrences: PhoneOccurrences) -> Iterator[RuleStatsRow]:
+  '''Yields the rows of get_rule_stats in the same order, but with numeric percentages and one rule at a time, so only the rows of one rule are held in memory.'''
+  words_to_rules = word_rules_to_rules_dict(word_rules)
+  words_to_rules = sort_word_rules_to_rules(words_to_rules)
+  rules_strs: Dict[WordEntry, str] = {}
+
+  for rule_id, (rule, words) in enumerate(words_to_rules.items()):
+    rule_str = rule_to_str(rule, positions=None)
+    total_occ = sum(phone_occurrences[word] for word in words)
+    rows = []
+    for word in words:
+      rules_str = rules_strs.get(word)
+      if rules_str is None:
+        rules_str = rules_strs[word] = rules_to_str(word_rules[word])
+      rows.append(get_rule_stats_row(rule_id + 1, rule_str, word,
+                  rules_str, phone_occurrences[word], total_occ))
+    rows.sort(key=get_rule_stats_sort_key)
+    yield from rows
+
+
 def sort_rule_stats(resulting_csv_data: List[RuleStatsEntry]):
   ''' Sorts: Nr ASC, Occurrences DESC, Phones ASC'''
-  resulting_csv_data.sort(key=lambda x: (x[0], x[7] - x[6], x[4]))
+  resulting_csv_data.sort(key=get_rule_stats_sort_key)
+
+
+def get_rule_stats_sort_key(row: Union[RuleStatsEntry, RuleStatsRow]) -> Tuple[int, int, str]:
+  '''Nr ASC, Occurrences DESC, Phones ASC; rows of one rule share the Nr.'''
+  return row[0], row[7] - row[6], row[4]
 
 
 def rule_stats_to_df(word_stats: List[RuleStatsEntry]) -> DataFrame:
   res = DataFrame(
     data=word_stats,
-    columns=["Nr", "Rule", "English", "Phonemes", "Phones", "All Rules",
-             "Occurrences", "Occurrences Total", "Occurrences (%)"],
+    columns=[name for name, _ in RULE_STATS_COLUMNS],
   )
 
   return res
@@ -0,0 +1,61 @@
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+DEFAULT_QUERY_CHUNKSIZE = 500
+
+
+class RulesStore():
+  '''SQLite key-value store; all entries are dropped if it was written by another version. Entries are looked up by key, so only the requested ones are held in memory.'''
+
+  def __init__(self, path: Path, version: str) -> None:
+    self.path = path
+    self.version = version
+    self._connection = sqlite3.connect(str(path))
+    self._connection.execute(
+      "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    self._connection.execute(
+      "CREATE TABLE IF NOT EXISTS rules (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+    row = self._connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+    if row is None or row[0] != version:
+      self._connection.execute("DELETE FROM rules")
+      self._connection.execute(
+        "INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (version,))
+    self._connection.commit()
+
+  def __enter__(self) -> "RulesStore":
+    return self
+
+  def __exit__(self, *args) -> None:
+    self.close()
+
+  def __len__(self) -> int:
+    return self._connection.execute("SELECT COUNT(*) FROM rules").fetchone()[0]
+
+  def get(self, key: str) -> Optional[bytes]:
+    row = self._connection.execute("SELECT value FROM rules WHERE key = ?", (key,)).fetchone()
+    if row is None:
+      return None
+    return row[0]
+
+  def get_many(self, keys: Iterable[str], chunksize: int = DEFAULT_QUERY_CHUNKSIZE) -> Dict[str, bytes]:
+    '''Returns the stored entries of keys; missing keys are left out. The keys are queried chunksize at a time, which stays below the SQLite limit of query parameters.'''
+    assert chunksize > 0
+    keys = list(dict.fromkeys(keys))
+    res: Dict[str, bytes] = {}
+    for start in range(0, len(keys), chunksize):
+      chunk = keys[start:start + chunksize]
+      placeholders = ", ".join("?" * len(chunk))
+      res.update(self._connection.execute(
+        f"SELECT key, value FROM rules WHERE key IN ({placeholders})", chunk))
+    return res
+
+  def put(self, key: str, value: bytes) -> None:
+    self._connection.execute("INSERT OR REPLACE INTO rules (key, value) VALUES (?, ?)", (key, value))
+
+  def commit(self) -> None:
+    self._connection.commit()
+
+  def close(self) -> None:
+    self.commit()
+    self._connection.close()
@@ -0,0 +1,72 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from accent_analyser.core.word_probabilities import Symbols
+
+Match = Tuple[int, int, int]
+
+
+class SymbolAutomaton():
+  '''Aho-Corasick automaton over symbol tuples: finds all occurrences of all patterns in one scan, so the time is linear in the length of the input plus the number of matches, independent of the number of patterns.'''
+
+  def __init__(self, patterns: Iterable[Symbols]) -> None:
+    self.patterns: List[Symbols] = []
+    self._transitions: List[Dict[str, int]] = [{}]
+    self._outputs: List[Tuple[int, ...]] = [()]
+    for pattern in patterns:
+      self._add_pattern(pattern)
+    self._failures = self._get_failures()
+
+  def __len__(self) -> int:
+    return len(self.patterns)
+
+  def _add_pattern(self, pattern: Symbols) -> None:
+    assert len(pattern) > 0
+    state = 0
+    for symbol in pattern:
+      next_state = self._transitions[state].get(symbol)
+      if next_state is None:
+        next_state = len(self._transitions)
+        self._transitions[state][symbol] = next_state
+        self._transitions.append({})
+        self._outputs.append(())
+      state = next_state
+    self._outputs[state] += (len(self.patterns),)
+    self.patterns.append(pattern)
+
+  def _get_failures(self) -> List[int]:
+    '''Breadth-first: the failure state of a state is the state of its longest proper suffix that is also a prefix of a pattern. The outputs of the failure state are appended, so every state lists all patterns ending there, longest first.'''
+    res = [0] * len(self._transitions)
+    queue = deque(self._transitions[0].values())
+    while len(queue) > 0:
+      state = queue.popleft()
+      for symbol, next_state in self._transitions[state].items():
+        queue.append(next_state)
+        failure = res[state]
+        while failure != 0 and symbol not in self._transitions[failure]:
+          failure = res[failure]
+        failure = self._transitions[failure].get(symbol, 0)
+        res[next_state] = failure
+        self._outputs[next_state] += self._outputs[failure]
+    return res
+
+  def iter_matches(self, symbols: Symbols) -> Iterator[Match]:
+    '''Yields (start, end, pattern id) of all matches ordered by end and then by descending length.'''
+    transitions = self._transitions
+    failures = self._failures
+    outputs = self._outputs
+    patterns = self.patterns
+    state = 0
+    for position, symbol in enumerate(symbols):
+      while state != 0 and symbol not in transitions[state]:
+        state = failures[state]
+      state = transitions[state].get(symbol, 0)
+      for pattern_id in outputs[state]:
+        yield position + 1 - len(patterns[pattern_id]), position + 1, pattern_id
+
+  def count_matches(self, symbols: Symbols) -> Dict[int, int]:
+    '''Returns how often each pattern occurs (overlapping occurrences included).'''
+    res: Dict[int, int] = {}
+    for _, _, pattern_id in self.iter_matches(symbols):
+      res[pattern_id] = res.get(pattern_id, 0) + 1
+    return res
@@ -0,0 +1,52 @@
+from array import array
+from sys import intern
+from typing import Dict, Iterable, List, Tuple
+
+Symbols = Tuple[str, ...]
+SymbolIds = array
+
+SYMBOL_IDS_TYPECODE = "I"
+
+
+class SymbolTable():
+  '''Maps each symbol to a small int and interns symbol tuples, so that equal tuples share one object.'''
+
+  def __init__(self) -> None:
+    self._ids: Dict[str, int] = {}
+    self._symbols: List[str] = []
+    self._interned: Dict[Symbols, Symbols] = {}
+
+  def __len__(self) -> int:
+    return len(self._symbols)
+
+  def __contains__(self, symbol: str) -> bool:
+    return symbol in self._ids
+
+  @property
+  def symbols(self) -> List[str]:
+    return list(self._symbols)
+
+  def get_id(self, symbol: str) -> int:
+    symbol_id = self._ids.get(symbol)
+    if symbol_id is None:
+      symbol_id = len(self._symbols)
+      symbol = intern(symbol)
+      self._ids[symbol] = symbol_id
+      self._symbols.append(symbol)
+    return symbol_id
+
+  def get_symbol(self, symbol_id: int) -> str:
+    return self._symbols[symbol_id]
+
+  def encode(self, symbols: Iterable[str]) -> SymbolIds:
+    return array(SYMBOL_IDS_TYPECODE, [self.get_id(symbol) for symbol in symbols])
+
+  def decode(self, symbol_ids: Iterable[int]) -> Symbols:
+    return tuple(self._symbols[symbol_id] for symbol_id in symbol_ids)
+
+  def intern(self, symbols: Symbols) -> Symbols:
+    res = self._interned.get(symbols)
+    if res is None:
+      res = tuple(self._symbols[self.get_id(symbol)] for symbol in symbols)
+      self._interned[res] = res
+    return res
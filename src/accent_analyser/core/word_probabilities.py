@@ -2,9 +2,11 @@ from logging import getLogger
 from random import choices
 from typing import Dict, List, Tuple
 
+import numpy as np
+from accent_analyser.core.instrumentation import instrumented
 from accent_analyser.core.rule_detection import (PhonemeOccurrences,
                                                  PhoneOccurrences)
-from pandas import DataFrame
+from pandas import DataFrame, Series, factorize
 
 Symbols = Tuple[str, ...]
 ProbabilitiesDict = Dict[Symbols, List[Tuple[Symbols, int]]]
@@ -14,24 +16,60 @@ _ProbabilityEntry = Tuple[str, str, int]
 _PHONEMES_COL_NAME = "Phonemes"
 _PHONES_COL_NAME = "Phones"
 _OCCURRENCE_COL_NAME = "Occurrence"
+_TOTAL_COL_NAME = "Total"
+_PROBABILITY_COL_NAME = "Probability"
 
 
 def get_probabilities(phone_occurrences: PhoneOccurrences, phoneme_occurrences: PhonemeOccurrences) -> List[_ProbabilityEntry]:
-  probabilities = []
-  for word, word_occurrences in phone_occurrences.items():
-    word_is_always_the_same = phoneme_occurrences[(
-      word.graphemes, word.phonemes)] == word_occurrences
-    if word_is_always_the_same:
-      continue
-    probabilities.append((
-      symbols_to_str_with_space(word.phonemes),
-      symbols_to_str_with_space(word.phones),
-      word_occurrences,
-    ))
+  df = get_probabilities_df(phone_occurrences, phoneme_occurrences)
+  res = list(zip(
+    df[_PHONEMES_COL_NAME].tolist(),
+    df[_PHONES_COL_NAME].tolist(),
+    df[_OCCURRENCE_COL_NAME].tolist(),
+  ))
+  return res
 
-  sort_probabilities(probabilities)
 
-  return probabilities
+@instrumented("word_probs")
+def get_probabilities_df(phone_occurrences: PhoneOccurrences, phoneme_occurrences: PhonemeOccurrences) -> DataFrame:
+  '''Table of all phones of words that are not always pronounced the same, in the order of sort_probabilities. Total is the sum of the occurrences of the phonemes in the table and Probability the share of the phones in it. Sorting and grouping work on the sorted integer codes of the strings.'''
+  words = list(phone_occurrences.keys())
+  occurrences = np.fromiter(phone_occurrences.values(), dtype=np.int64, count=len(words))
+
+  totals = np.fromiter((phoneme_occurrences[(word.graphemes, word.phonemes)] for word in words),
+                       dtype=np.int64, count=len(words))
+  keep = np.flatnonzero(totals != occurrences)
+
+  kept_words = [words[i] for i in keep]
+  occurrences = occurrences[keep]
+  # same as symbols_to_str_with_space
+  phonemes_codes, phonemes_strs = factorize(
+    Series([" ".join(word.phonemes) for word in kept_words], dtype=object), sort=True)
+  phones_codes, phones_strs = factorize(
+    Series([" ".join(word.phones) for word in kept_words], dtype=object), sort=True)
+
+  order = np.lexsort((
+    np.arange(len(kept_words)),
+    phones_codes,
+    -occurrences,
+    phonemes_codes,
+  ))
+  phonemes_codes = phonemes_codes[order]
+  phones_codes = phones_codes[order]
+  occurrences = occurrences[order]
+
+  group_totals = np.bincount(phonemes_codes, weights=occurrences,
+                             minlength=len(phonemes_strs)).astype(np.int64)
+  row_totals = group_totals[phonemes_codes]
+
+  res = DataFrame({
+    _PHONEMES_COL_NAME: np.asarray(phonemes_strs, dtype=object)[phonemes_codes],
+    _PHONES_COL_NAME: np.asarray(phones_strs, dtype=object)[phones_codes],
+    _OCCURRENCE_COL_NAME: occurrences,
+    _TOTAL_COL_NAME: row_totals,
+    _PROBABILITY_COL_NAME: occurrences / np.maximum(row_totals, 1),
+  })
+  return res
 
 
 def sort_probabilities(probabilities: List[_ProbabilityEntry]) -> None:
@@ -49,13 +87,20 @@ def probabilities_to_df(probs: List[_ProbabilityEntry]) -> DataFrame:
 
 def parse_probabilities_df(df: DataFrame) -> ProbabilitiesDict:
   res: ProbabilitiesDict = dict()
-  for _, row in df.iterrows():
-    phonemes = symbols_from_str_with_space(row[_PHONEMES_COL_NAME])
-    phones = symbols_from_str_with_space(row[_PHONES_COL_NAME])
-    prob = int(row[_OCCURRENCE_COL_NAME])
+  # each distinct string is split once and all its entries share the tuple
+  parsed: Dict[str, Symbols] = dict()
+  for phonemes_str, phones_str, occurrence in zip(df[_PHONEMES_COL_NAME], df[_PHONES_COL_NAME], df[_OCCURRENCE_COL_NAME]):
+    phonemes = parsed.get(phonemes_str)
+    if phonemes is None:
+      phonemes = symbols_from_str_with_space(phonemes_str)
+      parsed[phonemes_str] = phonemes
+    phones = parsed.get(phones_str)
+    if phones is None:
+      phones = symbols_from_str_with_space(phones_str)
+      parsed[phones_str] = phones
     if phonemes not in res:
       res[phonemes] = []
-    res[phonemes].append((phones, prob))
+    res[phonemes].append((phones, int(occurrence)))
   return res
 
 
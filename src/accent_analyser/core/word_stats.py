@@ -1,13 +1,26 @@
-from typing import List
+from typing import Dict, Iterator, List
 from typing import OrderedDict as OrderedDictType
-from typing import Tuple
+from typing import Tuple, Union
 
-from accent_analyser.core.rule_detection import (PhonemeOccurrences,
+from accent_analyser.core.rule_detection import (Graphemes, Phonemes,
+                                                 PhonemeOccurrences,
                                                  PhoneOccurrences, WordEntry,
                                                  WordRules, rules_to_str)
 from pandas import DataFrame
 
 WordStatsEntry = Tuple[str, str, str, str, int, int, str]
+WordStatsRow = Tuple[int, str, str, str, str, int, int, float]
+
+WORD_STATS_COLUMNS = [
+  ("Nr", int),
+  ("English", str),
+  ("Phonemes", str),
+  ("Phones", str),
+  ("Rules", str),
+  ("Occurrences", int),
+  ("Occurrences Total", int),
+  ("Occurrences (%)", float),
+]
 
 
 def get_word_stats(word_rules: OrderedDictType[WordEntry, WordRules], phone_occurrences: PhoneOccurrences, phoneme_occurrences: PhonemeOccurrences) -> List[WordStatsEntry]:
@@ -19,34 +32,64 @@ def get_word_stats(word_rules: OrderedDictType[WordEntry, WordRules], phone_occu
     total_occ = phoneme_occurrences[(word.graphemes, word.phonemes)]
     phone_occ = phone_occurrences[word]
     rules_str = rules_to_str(rule)
-    occurrence_percent = phone_occ / total_occ * 100
-
-    res.append((
-      phoneme_id_one_based,
-      word.graphemes_str,
-      word.phonemes_str,
-      word.phones_str,
-      rules_str,
-      phone_occ,
-      total_occ,
-      f"{occurrence_percent:.2f}",
-    ))
+    res.append(get_word_stats_entry(phoneme_id_one_based, word, rules_str, phone_occ, total_occ))
 
   sort_word_stats(res)
   # res.sort(key=lambda x: (x[0], x[4] - x[3], x[1].phones_str))
   return res
 
 
+def get_word_stats_entry(nr: int, word: WordEntry, rules_str: str, phone_occ: int, total_occ: int) -> WordStatsEntry:
+  row = get_word_stats_row(nr, word, rules_str, phone_occ, total_occ)
+  res = row[:-1] + (f"{row[-1]:.2f}",)
+  return res
+
+
+def get_word_stats_row(nr: int, word: WordEntry, rules_str: str, phone_occ: int, total_occ: int) -> WordStatsRow:
+  occurrence_percent = phone_occ / total_occ * 100
+  res = (
+    nr,
+    word.graphemes_str,
+    word.phonemes_str,
+    word.phones_str,
+    rules_str,
+    phone_occ,
+    total_occ,
+    occurrence_percent,
+  )
+  return res
+
+
+def iter_word_stats(word_rules: OrderedDictType[WordEntry, WordRules], phone_occurrences: PhoneOccurrences, phoneme_occurrences: PhonemeOccurrences) -> Iterator[WordStatsRow]:
+  '''Yields the rows of get_word_stats in the same order, but with numeric percentages and one phoneme group at a time, so only the rows of one group are held in memory.'''
+  groups: Dict[Tuple[Graphemes, Phonemes], List[WordEntry]] = {}
+  for word in word_rules:
+    groups.setdefault((word.graphemes, word.phonemes), []).append(word)
+
+  for phoneme_id, group in enumerate(sorted(phoneme_occurrences.keys())):
+    total_occ = phoneme_occurrences[group]
+    rows = [
+      get_word_stats_row(phoneme_id + 1, word, rules_to_str(word_rules[word]), phone_occurrences[word], total_occ)
+      for word in groups.get(group, ())
+    ]
+    rows.sort(key=get_word_stats_sort_key)
+    yield from rows
+
+
 def sort_word_stats(resulting_csv_data: List[WordStatsEntry]):
   ''' Sorts: Word ASC, Occurrences DESC, Phones ASC'''
-  resulting_csv_data.sort(key=lambda x: (x[0], x[6] - x[5], x[3]))
+  resulting_csv_data.sort(key=get_word_stats_sort_key)
+
+
+def get_word_stats_sort_key(row: Union[WordStatsEntry, WordStatsRow]) -> Tuple[int, int, str]:
+  '''Nr ASC, Occurrences DESC, Phones ASC; rows of one phoneme group share the Nr.'''
+  return row[0], row[6] - row[5], row[3]
 
 
 def word_stats_to_df(word_stats: List[WordStatsEntry]) -> DataFrame:
   res = DataFrame(
     data=word_stats,
-    columns=["Nr", "English", "Phonemes", "Phones", "Rules",
-             "Occurrences", "Occurrences Total", "Occurrences (%)"],
+    columns=[name for name, _ in WORD_STATS_COLUMNS],
   )
 
   return res
@@ -0,0 +1,92 @@
+from accent_analyser.core.accentuation import (accentuate_sentences_chunked,
+                                               accentuate_symbols_batch,
+                                               get_word_spans)
+from accent_analyser.core.probability_sampler import ProbabilitySampler
+
+# region get_word_spans
+
+
+def test_get_word_spans__strips_punctuation():
+  symbols = ("a", "b", ",", " ", "c", " ", " ", "-", "d", ".")
+
+  res = get_word_spans(symbols)
+
+  assert res == [(0, 2), (4, 5), (8, 9)]
+
+
+def test_get_word_spans__empty():
+  assert get_word_spans(()) == []
+  assert get_word_spans((" ", ".")) == []
+
+# endregion
+
+# region accentuate_symbols_batch
+
+
+def test_accentuate_symbols_batch__replaces_known_words_only():
+  sampler = ProbabilitySampler({
+    ("a", "b"): [(("a", "c"), 1)],
+    ("d",): [((), 1)],
+  })
+  sentences = [
+    ("a", "b", ",", " ", "x", " ", "d", "."),
+    ("a", "b", "x"),
+    (),
+  ]
+
+  res = accentuate_symbols_batch(sentences, sampler)
+
+  assert res == [
+    ("a", "c", ",", " ", "x", " ", "."),
+    ("a", "b", "x"),
+    (),
+  ]
+
+# endregion
+
+# region accentuate_sentences_chunked
+
+
+def get_test_probabilities():
+  res = {
+    ("a", "b"): [
+      (("a", "c"), 1),
+      (("a", "d"), 1),
+    ],
+  }
+  return res
+
+
+def test_accentuate_sentences_chunked__keeps_order_and_unknown_words():
+  sentences = ["ab xy.", "xy", "", "ab, ab"]
+
+  res = list(accentuate_sentences_chunked(sentences, get_test_probabilities(), chunksize=3))
+
+  assert len(res) == 4
+  assert res[0] in ["ac xy.", "ad xy."]
+  assert res[1:3] == ["xy", ""]
+  assert res[3][:3] in ["ac,", "ad,"]
+
+
+def test_accentuate_sentences_chunked__same_seed__same_result():
+  sentences = ["ab ab ab ab"] * 20
+
+  res1 = list(accentuate_sentences_chunked(sentences, get_test_probabilities(), seed=1, chunksize=7))
+  res2 = list(accentuate_sentences_chunked(sentences, get_test_probabilities(), seed=1, chunksize=7))
+  res3 = list(accentuate_sentences_chunked(sentences, get_test_probabilities(), seed=2, chunksize=7))
+
+  assert res1 == res2
+  assert res1 != res3
+
+
+def test_accentuate_sentences_chunked__parallel_equals_serial():
+  sentences = [f"ab xy{i} ab" for i in range(50)]
+
+  res_serial = list(accentuate_sentences_chunked(
+    sentences, get_test_probabilities(), seed=3, n_jobs=1, chunksize=4))
+  res_parallel = list(accentuate_sentences_chunked(
+    sentences, get_test_probabilities(), seed=3, n_jobs=2, chunksize=4))
+
+  assert res_parallel == res_serial
+
+# endregion
@@ -0,0 +1,123 @@
+import random
+from difflib import ndiff
+
+from accent_analyser.core.alignment import (ADD_TAG, EQUAL_TAG, REMOVE_TAG,
+                                            get_diff_lines,
+                                            get_matching_blocks,
+                                            has_similar_pair)
+
+
+def get_ndiff_lines(a, b):
+  return [(line[:2], line[2:]) for line in ndiff(a, b)]
+
+
+# region get_diff_lines
+
+
+def test_get_diff_lines__empty():
+  res = get_diff_lines([], [])
+
+  assert res == []
+
+
+def test_get_diff_lines__substitution__remove_add():
+  res = get_diff_lines(["a"], ["c"])
+
+  assert res == [(REMOVE_TAG, "a"), (ADD_TAG, "c")]
+
+
+def test_get_diff_lines__substitution__add_remove():
+  res = get_diff_lines(["a", "b"], ["c"])
+
+  assert res == [(ADD_TAG, "c"), (REMOVE_TAG, "a"), (REMOVE_TAG, "b")]
+
+
+def test_get_diff_lines__equal():
+  res = get_diff_lines(["a", "b"], ["a", "b"])
+
+  assert res == [(EQUAL_TAG, "a"), (EQUAL_TAG, "b")]
+
+
+def test_get_diff_lines__similar_symbols__contain_hints():
+  a = ["e", "ɪ̯", "t"]
+  b = ["e", "ɪ̯ː", "t"]
+
+  res = get_diff_lines(a, b)
+
+  assert res == get_ndiff_lines(a, b)
+  assert any(tag == "? " for tag, _ in res)
+
+
+def test_get_diff_lines__similar_symbols_between_equal_blocks__equals_ndiff():
+  a = ["h", "aɪ", "x", "t", "aɪ", "ə"]
+  b = ["h", "aɪ̯", "t", "aɪ̯ː", "ə"]
+
+  res = get_diff_lines(a, b)
+
+  assert res == get_ndiff_lines(a, b)
+  assert any(tag == "? " for tag, _ in res)
+
+
+def test_get_diff_lines__long_input__equals_ndiff():
+  rnd = random.Random(1)
+  a = rnd.choices(["a", "b", "c"], k=10)
+  b = rnd.choices(["a", "b", "c"], k=200)
+
+  res = get_diff_lines(a, b)
+
+  assert res == get_ndiff_lines(a, b)
+
+
+def test_get_diff_lines__random_inputs__equal_ndiff():
+  rnd = random.Random(1234)
+  symbols = ["a", "b", "c", "d", "ə", "ɪ", "ɪ̯", "aɪ", "aɪ̯", "tʰ", "t", "ab", "abc", "abd", " ", "a b", ""]
+  for _ in range(5000):
+    a = rnd.choices(symbols, k=rnd.randint(0, 8))
+    b = rnd.choices(symbols, k=rnd.randint(0, 8))
+
+    res = get_diff_lines(a, b)
+
+    assert res == get_ndiff_lines(a, b), (a, b)
+
+
+# endregion
+
+# region get_matching_blocks
+
+
+def test_get_matching_blocks__returns_sentinel():
+  res = get_matching_blocks(["a"], ["b", "c"])
+
+  assert res == [(1, 2, 0)]
+
+
+def test_get_matching_blocks__longest_match_first():
+  res = get_matching_blocks(["x", "a", "b", "y"], ["a", "b", "x"])
+
+  assert res == [(1, 0, 2), (4, 3, 0)]
+
+
+# endregion
+
+# region has_similar_pair
+
+
+def test_has_similar_pair__different_chars__returns_false():
+  res = has_similar_pair(["ab"], ["cd"])
+
+  assert not res
+
+
+def test_has_similar_pair__different_lengths__returns_false():
+  res = has_similar_pair(["t"], ["tʰ"])
+
+  assert not res
+
+
+def test_has_similar_pair__similar__returns_true():
+  res = has_similar_pair(["x", "aɪ"], ["aɪ̯"])
+
+  assert res
+
+
+# endregion
@@ -0,0 +1,341 @@
+from collections import Counter, OrderedDict
+
+import numpy as np
+from accent_analyser.core.cluster_rules import (AGGLOMERATIVE, COSINE,
+                                                JENSEN_SHANNON, K_MEDOIDS,
+                                                cluster_distances,
+                                                cluster_fingerprints,
+                                                compare_two_fingerprints,
+                                                get_condensed_distances,
+                                                get_cosine_similarities,
+                                                get_fingerprint,
+                                                get_fingerprints_matrix,
+                                                get_js_divergences,
+                                                get_js_divergences_block,
+                                                get_rule_columns)
+from accent_analyser.core.rule_detection import Rule, RuleType, WordEntry
+from ordered_set import OrderedSet
+from scipy.sparse import csr_matrix
+from scipy.spatial.distance import jensenshannon, pdist, squareform
+
+RULE1 = Rule(
+  rule_type=RuleType.SUBSTITUTION,
+  from_symbols=("a",),
+  to_symbols=("b",),
+)
+
+RULE2 = Rule(
+  rule_type=RuleType.OMISSION,
+  from_symbols=("c",),
+  to_symbols=(),
+)
+
+RULE3 = Rule(
+  rule_type=RuleType.SUBSTITUTION,
+  from_symbols=("d",),
+  to_symbols=("e",),
+)
+
+
+# region get_fingerprint
+
+def test_get_fingerprint__normalized_rule_frequencies_in_vocabulary_columns():
+  word1 = WordEntry(
+    graphemes=("x",),
+    phonemes=("a",),
+    phones=("b",),
+  )
+  word2 = WordEntry(
+    graphemes=("y",),
+    phonemes=("c",),
+    phones=(),
+  )
+  word_rules = OrderedDict([
+    (word1, OrderedDict([((0,), RULE1)])),
+    (word2, OrderedDict([((0,), RULE2)])),
+  ])
+  phone_occurrences = Counter({word1: 3, word2: 1})
+  phoneme_occurrences = Counter({(("x",), ("a",)): 3, (("y",), ("c",)): 1})
+  all_rules = OrderedSet([RULE3, RULE2, RULE1])
+
+  res = get_fingerprint(word_rules, phone_occurrences, phoneme_occurrences, all_rules)
+
+  assert res.shape == (1, 3)
+  np.testing.assert_allclose(res.toarray(), [[0, 0.25, 0.75]])
+
+
+def test_get_fingerprint__no_rules__is_empty():
+  word = WordEntry(
+    graphemes=("x",),
+    phonemes=("a",),
+    phones=("a",),
+  )
+  word_rules = OrderedDict([(word, OrderedDict())])
+  phone_occurrences = Counter({word: 2})
+  phoneme_occurrences = Counter({(("x",), ("a",)): 2})
+
+  res = get_fingerprint(word_rules, phone_occurrences, phoneme_occurrences, OrderedSet([RULE1]))
+
+  assert res.shape == (1, 1)
+  assert res.nnz == 0
+
+
+def test_get_fingerprint__missing_rules_are_added_to_vocabulary():
+  word = WordEntry(
+    graphemes=("y",),
+    phonemes=("c", "a"),
+    phones=("b",),
+  )
+  word_rules = OrderedDict([(word, OrderedDict([((0,), RULE2), ((1,), RULE1)]))])
+  phone_occurrences = Counter({word: 1})
+  phoneme_occurrences = Counter({(("y",), ("c", "a")): 1})
+  all_rules = OrderedSet([RULE1])
+
+  res = get_fingerprint(word_rules, phone_occurrences, phoneme_occurrences, all_rules)
+
+  assert list(all_rules) == [RULE1, RULE2]
+  assert res.shape == (1, 2)
+  np.testing.assert_allclose(res.toarray(), [[0.5, 0.5]])
+
+# endregion
+
+# region get_fingerprints_matrix
+
+
+def test_get_fingerprints_matrix__pads_shorter_fingerprints():
+  fingerprint1 = csr_matrix(np.array([[1.0]]))
+  fingerprint2 = csr_matrix(np.array([[0.5, 0, 0.5]]))
+
+  res = get_fingerprints_matrix([fingerprint1, fingerprint2])
+
+  assert res.shape == (2, 3)
+  np.testing.assert_array_equal(res.toarray(), [[1, 0, 0], [0.5, 0, 0.5]])
+
+
+def test_get_fingerprints_matrix__empty():
+  res = get_fingerprints_matrix([])
+
+  assert res.shape == (0, 0)
+
+# endregion
+
+# region get_cosine_similarities
+
+
+def test_get_cosine_similarities():
+  fingerprints = csr_matrix(np.array([
+    [0.5, 0.5, 0],
+    [0.5, 0.5, 0],
+    [0, 0, 1.0],
+    [0, 0, 0],
+  ]))
+
+  res = get_cosine_similarities(fingerprints)
+
+  np.testing.assert_allclose(res, [
+    [1, 1, 0, 0],
+    [1, 1, 0, 0],
+    [0, 0, 1, 0],
+    [0, 0, 0, 0],
+  ])
+
+# endregion
+
+# region get_js_divergences
+
+
+def test_get_js_divergences__identical_is_zero_and_disjoint_is_one():
+  fingerprints = csr_matrix(np.array([
+    [0.5, 0.5, 0],
+    [0.5, 0.5, 0],
+    [0, 0, 1.0],
+  ]))
+
+  res = get_js_divergences(fingerprints)
+
+  np.testing.assert_allclose(res, [
+    [0, 0, 1],
+    [0, 0, 1],
+    [1, 1, 0],
+  ], atol=1e-12)
+
+
+def test_get_js_divergences__partial_overlap():
+  fingerprints = csr_matrix(np.array([
+    [1.0, 0],
+    [0.5, 0.5],
+  ]))
+
+  res = get_js_divergences(fingerprints)
+
+  # M = (0.75, 0.25); JS = 0.5 * (KL(P||M) + KL(Q||M))
+  expected = 0.5 * (np.log2(1 / 0.75) + 0.5 * np.log2(0.5 / 0.75) + 0.5 * np.log2(0.5 / 0.25))
+  np.testing.assert_allclose(res, [[0, expected], [expected, 0]])
+
+
+def test_get_js_divergences__empty_fingerprints():
+  fingerprints = csr_matrix(np.array([
+    [1.0, 0],
+    [0, 0],
+    [0, 0],
+  ]))
+
+  res = get_js_divergences(fingerprints)
+
+  np.testing.assert_array_equal(res, [
+    [0, 1, 1],
+    [1, 0, 0],
+    [1, 0, 0],
+  ])
+
+# endregion
+
+# region compare_two_fingerprints
+
+
+def test_compare_two_fingerprints__different_lengths():
+  fingerprint1 = csr_matrix(np.array([[1.0]]))
+  fingerprint2 = csr_matrix(np.array([[1.0, 1.0]]))
+
+  res = compare_two_fingerprints(fingerprint1, fingerprint2)
+
+  np.testing.assert_allclose(res, 1 / np.sqrt(2))
+
+# endregion
+
+# region get_condensed_distances
+
+
+def get_test_fingerprints() -> csr_matrix:
+  res = csr_matrix(np.array([
+    [0.5, 0.5, 0, 0],
+    [0.25, 0.75, 0, 0],
+    [0, 0, 0, 0],
+    [0, 0.2, 0.3, 0.5],
+    [0, 0, 0, 1.0],
+  ]))
+  return res
+
+
+def test_get_condensed_distances__cosine__block_size_has_no_influence():
+  fingerprints = get_test_fingerprints()
+  expected = squareform(1 - get_cosine_similarities(fingerprints), checks=False)
+  expected[[1, 4, 7, 8]] = 1.0
+
+  for block_size in [1, 2, 5, 100]:
+    res = get_condensed_distances(fingerprints, COSINE, block_size)
+    np.testing.assert_allclose(res, expected, atol=1e-12)
+
+
+def test_get_condensed_distances__jensen_shannon__block_size_has_no_influence():
+  fingerprints = get_test_fingerprints()
+  expected = np.sqrt(squareform(get_js_divergences(fingerprints), checks=False))
+
+  for block_size in [1, 2, 5, 100]:
+    res = get_condensed_distances(fingerprints, JENSEN_SHANNON, block_size)
+    np.testing.assert_allclose(res, expected, atol=1e-12)
+
+
+def test_get_condensed_distances__cosine__equals_scipy():
+  fingerprints = get_test_fingerprints()
+  non_empty = fingerprints[[0, 1, 3, 4]]
+
+  res = get_condensed_distances(non_empty, COSINE, 3)
+
+  np.testing.assert_allclose(res, pdist(non_empty.toarray(), "cosine"), atol=1e-12)
+
+
+def test_get_condensed_distances__jensen_shannon__equals_scipy():
+  fingerprints = get_test_fingerprints()
+  non_empty = fingerprints[[0, 1, 3, 4]]
+
+  res = get_condensed_distances(non_empty, JENSEN_SHANNON, 3)
+
+  expected = pdist(non_empty.toarray(), lambda p, q: jensenshannon(p, q, base=2))
+  np.testing.assert_allclose(res, expected, atol=1e-7)
+
+
+def test_get_js_divergences_block__max_pairs_has_no_influence():
+  rng = np.random.default_rng(0)
+  dense = rng.random((12, 7)) * (rng.random((12, 7)) < 0.5)
+  dense /= np.maximum(dense.sum(axis=1, keepdims=True), 1e-12)
+  columns = get_rule_columns(csr_matrix(dense))
+  expected = get_js_divergences_block(columns, 3, 9)
+
+  for max_pairs in [1, 5, 40]:
+    res = get_js_divergences_block(columns, 3, 9, max_pairs)
+    np.testing.assert_allclose(res, expected, atol=1e-12)
+
+
+def test_get_condensed_distances__single_fingerprint():
+  res = get_condensed_distances(csr_matrix(np.array([[1.0]])))
+
+  assert len(res) == 0
+
+# endregion
+
+# region cluster_distances
+
+
+def get_three_groups() -> np.ndarray:
+  points = np.array([0.0, 0.1, 0.2, 5.0, 5.1, 10.0, 10.2, 10.3])
+  res = np.abs(points[:, np.newaxis] - points[np.newaxis, :])
+  return res
+
+
+def assert_same_partition(labels: np.ndarray, expected: list) -> None:
+  assert len(set(zip(labels, expected))) == len(set(expected)) == len(set(labels))
+
+
+def test_cluster_distances__agglomerative():
+  res = cluster_distances(get_three_groups(), 3, AGGLOMERATIVE)
+
+  assert_same_partition(res, [0, 0, 0, 1, 1, 2, 2, 2])
+
+
+def test_cluster_distances__k_medoids():
+  res = cluster_distances(get_three_groups(), 3, K_MEDOIDS, seed=1)
+
+  assert_same_partition(res, [0, 0, 0, 1, 1, 2, 2, 2])
+
+
+def test_cluster_distances__condensed_equals_square():
+  distances = get_three_groups()
+
+  for method in [AGGLOMERATIVE, K_MEDOIDS]:
+    res_square = cluster_distances(distances, 2, method)
+    res_condensed = cluster_distances(squareform(distances), 2, method)
+    np.testing.assert_array_equal(res_square, res_condensed)
+
+
+def test_cluster_distances__k_medoids__identical_points__no_empty_cluster():
+  distances = np.zeros((4, 4))
+
+  res = cluster_distances(distances, 3, K_MEDOIDS)
+
+  assert set(res) == {0, 1, 2}
+
+
+def test_cluster_distances__single_speaker():
+  res = cluster_distances(np.zeros((1, 1)), 1)
+
+  np.testing.assert_array_equal(res, [0])
+
+# endregion
+
+# region cluster_fingerprints
+
+
+def test_cluster_fingerprints():
+  fingerprints = [
+    csr_matrix(np.array([[0.5, 0.5]])),
+    csr_matrix(np.array([[0, 0, 1.0]])),
+    csr_matrix(np.array([[0.4, 0.6]])),
+    csr_matrix(np.array([[0, 0.1, 0.9]])),
+  ]
+
+  for method in [AGGLOMERATIVE, K_MEDOIDS]:
+    res = cluster_fingerprints(fingerprints, 2, method=method, block_size=3)
+    assert_same_partition(res, [0, 1, 0, 1])
+
+# endregion
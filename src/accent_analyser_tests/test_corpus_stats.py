@@ -0,0 +1,95 @@
+import pickle
+
+from accent_analyser.core.corpus_stats import (CorpusStats,
+                                               corpus_stats_from_bytes,
+                                               corpus_stats_to_bytes,
+                                               get_corpus_stats,
+                                               load_corpus_stats,
+                                               merge_corpus_stats,
+                                               save_corpus_stats)
+from accent_analyser.core.rule_detection import WordEntry
+
+WORD1 = WordEntry(
+  graphemes=("a",),
+  phonemes=("b", "c"),
+  phones=("d", "c"),
+)
+
+WORD2 = WordEntry(
+  graphemes=("a",),
+  phonemes=("b", "c"),
+  phones=("b", "c"),
+)
+
+WORD3 = WordEntry(
+  graphemes=("x",),
+  phonemes=("y", "z"),
+  phones=("y",),
+)
+
+
+def assert_stats_are_equal(stats1: CorpusStats, stats2: CorpusStats) -> None:
+  assert stats1.occurrences.phone_occurrences == stats2.occurrences.phone_occurrences
+  assert list(stats1.occurrences.phone_occurrences) == list(stats2.occurrences.phone_occurrences)
+  assert stats1.occurrences.phoneme_occurrences == stats2.occurrences.phoneme_occurrences
+  assert stats1.word_rules == stats2.word_rules
+  assert list(stats1.word_rules) == list(stats2.word_rules)
+
+
+def test_get_corpus_stats():
+  res = get_corpus_stats([WORD1, WORD2, WORD1])
+
+  assert res.occurrences.phone_occurrences == {WORD1: 2, WORD2: 1}
+  assert res.occurrences.phoneme_occurrences == {(("a",), ("b", "c")): 3}
+  assert list(res.word_rules.keys()) == [WORD1, WORD2]
+  assert len(res.word_rules[WORD2]) == 0
+
+
+def test_merge_corpus_stats__equals_stats_of_all_words():
+  stats1 = get_corpus_stats([WORD1, WORD2])
+  stats2 = get_corpus_stats([WORD3, WORD1])
+
+  res = merge_corpus_stats(stats1, stats2)
+
+  assert_stats_are_equal(res, get_corpus_stats([WORD1, WORD2, WORD3, WORD1]))
+
+
+def test_merge_corpus_stats__inputs_are_unchanged():
+  stats1 = get_corpus_stats([WORD1])
+  stats2 = get_corpus_stats([WORD1])
+
+  merge_corpus_stats(stats1, stats2)
+
+  assert stats1.occurrences.phone_occurrences == {WORD1: 1}
+
+
+def test_corpus_stats_from_bytes__restores_stats():
+  stats = get_corpus_stats([WORD1, WORD2, WORD3, WORD1])
+
+  res = corpus_stats_from_bytes(corpus_stats_to_bytes(stats))
+
+  assert_stats_are_equal(res, stats)
+
+
+def test_corpus_stats_from_bytes__empty_stats():
+  res = corpus_stats_from_bytes(corpus_stats_to_bytes(CorpusStats()))
+
+  assert_stats_are_equal(res, CorpusStats())
+
+
+def test_pickle__restores_stats():
+  stats = get_corpus_stats([WORD1, WORD3])
+
+  res = pickle.loads(pickle.dumps(stats))
+
+  assert_stats_are_equal(res, stats)
+
+
+def test_load_corpus_stats__restores_saved_stats(tmp_path):
+  stats = get_corpus_stats([WORD1, WORD3])
+  path = tmp_path / "stats.bin"
+
+  save_corpus_stats(stats, path)
+  res = load_corpus_stats(path)
+
+  assert_stats_are_equal(res, stats)
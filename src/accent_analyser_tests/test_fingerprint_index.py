@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import numpy as np
+from accent_analyser.core.cluster_rules import get_cosine_similarities
+from accent_analyser.core.fingerprint_index import FingerprintIndex
+from scipy.sparse import csr_matrix
+
+
+def get_test_fingerprints(n_speakers: int, n_rules: int, seed: int = 0) -> csr_matrix:
+  rng = np.random.default_rng(seed)
+  values = rng.random((n_speakers, n_rules)) * (rng.random((n_speakers, n_rules)) < 0.2)
+  res = csr_matrix(values)
+  return res
+
+
+def test_query__returns_exact_similarities_sorted():
+  fingerprints = get_test_fingerprints(50, 30)
+  index = FingerprintIndex(bits_count=4, tables_count=4)
+  index.add([str(i) for i in range(50)], fingerprints)
+
+  res = index.query(fingerprints[3], k=5)
+
+  similarities = get_cosine_similarities(fingerprints)[3]
+  assert len(res) == 5
+  assert res[0][0] == "3"
+  np.testing.assert_allclose(res[0][1], 1.0)
+  for key, similarity in res:
+    np.testing.assert_allclose(similarity, similarities[int(key)])
+  assert [similarity for _, similarity in res] == sorted((similarity for _, similarity in res), reverse=True)
+
+
+def test_query__few_candidates__compares_all():
+  fingerprints = csr_matrix(np.array([
+    [1.0, 0, 0],
+    [0, 1.0, 0],
+    [0.5, 0.5, 0],
+  ]))
+  index = FingerprintIndex(bits_count=32, tables_count=1)
+  index.add(["a", "b", "c"], fingerprints)
+
+  res = index.query(csr_matrix(np.array([[1.0, 0, 0]])), k=3)
+
+  assert [key for key, _ in res] == ["a", "c", "b"]
+
+
+def test_query__empty_index():
+  index = FingerprintIndex()
+
+  res = index.query(csr_matrix(np.array([[1.0]])))
+
+  assert res == []
+
+
+def test_add__grown_vocabulary():
+  index = FingerprintIndex(bits_count=4, tables_count=2)
+  index.add(["a"], csr_matrix(np.array([[1.0, 0]])))
+  index.add(["b", "c"], csr_matrix(np.array([[1.0, 0, 1.0], [0, 0, 1.0]])))
+
+  res = index.query(csr_matrix(np.array([[0, 0, 1.0, 0]])), k=3)
+
+  assert index.rules_count == 4
+  assert len(index) == 3
+  assert "b" in index
+  assert [key for key, _ in res] == ["c", "b", "a"]
+  np.testing.assert_allclose([similarity for _, similarity in res], [1, np.sqrt(0.5), 0])
+
+
+def test_save_load__same_results(tmp_path: Path):
+  fingerprints = get_test_fingerprints(40, 20)
+  index = FingerprintIndex(bits_count=6, tables_count=3, seed=1)
+  index.add([str(i) for i in range(40)], fingerprints)
+  path = tmp_path / "index.npz"
+
+  index.save(path)
+  res = FingerprintIndex.load(path)
+
+  assert res.keys == index.keys
+  assert (res.bits_count, res.tables_count, res.seed) == (6, 3, 1)
+  for speaker in range(0, 40, 7):
+    assert res.query(fingerprints[speaker], k=4) == index.query(fingerprints[speaker], k=4)
+
+
+def test_save_load__empty(tmp_path: Path):
+  path = tmp_path / "index.npz"
+
+  FingerprintIndex().save(path)
+  res = FingerprintIndex.load(path)
+
+  assert len(res) == 0
@@ -0,0 +1,89 @@
+from accent_analyser.core.incremental_stats import IncrementalStats
+from accent_analyser.core.occurrences import Occurrences
+from accent_analyser.core.rule_detection import (WordEntry,
+                                                 get_rules_from_words)
+from accent_analyser.core.rule_stats import get_rule_stats
+from accent_analyser.core.word_stats import get_word_stats
+from ordered_set import OrderedSet
+
+WORD1 = WordEntry(
+  graphemes=("t", "e", "s", "t"),
+  phonemes=("t", "ɛ", "s", "t"),
+  phones=("t", "ɛ", "s"),
+)
+
+WORD2 = WordEntry(
+  graphemes=("t", "e", "s", "t"),
+  phonemes=("t", "ɛ", "s", "t"),
+  phones=("t", "ɛ", "s", "t"),
+)
+
+WORD3 = WordEntry(
+  graphemes=("a", "b"),
+  phonemes=("a", "b"),
+  phones=("a", "p"),
+)
+
+WORD4 = WordEntry(
+  graphemes=("b", "e", "s", "t"),
+  phonemes=("b", "ɛ", "s", "t"),
+  phones=("b", "ɛ", "s"),
+)
+
+
+def get_batch_stats(words):
+  occurrences = Occurrences(words)
+  word_rules = get_rules_from_words(OrderedSet(occurrences.phone_occurrences.keys()))
+  word_stats = get_word_stats(word_rules, occurrences.phone_occurrences,
+                              occurrences.phoneme_occurrences)
+  rule_stats = get_rule_stats(word_rules, occurrences.phone_occurrences)
+  return word_stats, rule_stats
+
+
+def test_get_word_stats__empty():
+  stats = IncrementalStats()
+
+  assert stats.get_word_stats() == []
+  assert stats.get_rule_stats() == []
+
+
+def test_add__one_batch_equals_batch_stats():
+  words = [WORD1, WORD2, WORD1, WORD3]
+  stats = IncrementalStats()
+
+  stats.add(words)
+
+  assert (stats.get_word_stats(), stats.get_rule_stats()) == get_batch_stats(words)
+
+
+def test_add__several_batches_equal_batch_stats():
+  batches = [[WORD3], [WORD1, WORD2], [WORD4, WORD2, WORD2], [WORD3, WORD1]]
+  stats = IncrementalStats()
+  words = []
+
+  for batch in batches:
+    stats.add(batch)
+    words.extend(batch)
+    assert (stats.get_word_stats(), stats.get_rule_stats()) == get_batch_stats(words)
+
+
+def test_add__only_affected_groups_and_rules_are_marked():
+  stats = IncrementalStats()
+  stats.add([WORD1, WORD2, WORD3])
+  stats.get_word_stats()
+
+  stats.add([WORD3])
+
+  assert stats._dirty_groups == {(WORD3.graphemes, WORD3.phonemes)}
+  assert stats._dirty_rules == set(stats.word_rules[WORD3].values())
+
+
+def test_get_rule_stats__rule_numbers_follow_sorting():
+  stats = IncrementalStats()
+  stats.add([WORD3])
+  stats.add([WORD1])
+
+  res = stats.get_rule_stats()
+
+  assert [row[1] for row in res] == [row[1] for row in get_batch_stats([WORD3, WORD1])[1]]
+  assert [row[0] for row in res] == [1, 2]
@@ -0,0 +1,161 @@
+import tracemalloc
+from threading import Event, Thread
+from time import sleep
+
+import pytest
+from accent_analyser.core import instrumentation
+from accent_analyser.core.instrumentation import (disable, enable,
+                                                   get_profile_rows,
+                                                   get_stage_stats,
+                                                   instrumented, is_enabled,
+                                                   reset, stage)
+
+
+@instrumented("square")
+def square(value: int) -> int:
+  return value * value
+
+
+def test_instrumented__disabled__records_nothing():
+  disable()
+  reset()
+
+  res = square(3)
+
+  assert res == 9
+  assert not is_enabled()
+  assert get_profile_rows() == []
+
+
+def test_instrumented__enabled__counts_calls():
+  enable(trace_memory=False)
+  reset()
+  try:
+    square(2)
+    square(3)
+  finally:
+    disable()
+
+  res = get_stage_stats("square")
+
+  assert res.calls == 2
+  assert res.wall_time > 0
+  assert res.traced_peak is None
+  reset()
+
+
+def test_stage__no_reset_peak__no_traced_peak(monkeypatch):
+  monkeypatch.setattr(instrumentation, "_CAN_RESET_PEAK", False)
+  was_tracing = tracemalloc.is_tracing()
+  enable(trace_memory=True)
+  reset()
+  try:
+    with stage("stage"):
+      data = bytearray(1000000)
+    del data
+    started_tracing = tracemalloc.is_tracing() and not was_tracing
+  finally:
+    disable()
+
+  assert get_stage_stats("stage").calls == 1
+  assert get_stage_stats("stage").traced_peak is None
+  assert not started_tracing
+  reset()
+
+
+requires_reset_peak = pytest.mark.skipif(
+  not hasattr(tracemalloc, "reset_peak"), reason="tracemalloc.reset_peak requires Python 3.9")
+
+
+@requires_reset_peak
+def test_stage__nested__outer_includes_inner():
+  enable(trace_memory=True)
+  reset()
+  try:
+    with stage("outer"):
+      with stage("inner"):
+        data = bytearray(1000000)
+        sleep(0.01)
+      del data
+  finally:
+    disable()
+
+  outer = get_stage_stats("outer")
+  inner = get_stage_stats("inner")
+
+  assert [row[0] for row in get_profile_rows()] == ["inner", "outer"]
+  assert inner.traced_peak >= 1000000
+  assert outer.traced_peak >= inner.traced_peak
+  assert outer.wall_time >= inner.wall_time >= 0.01
+  reset()
+
+
+def test_stage__exception__is_recorded_and_raised():
+  enable(trace_memory=False)
+  reset()
+  raised = False
+  try:
+    with stage("failing"):
+      raise ValueError()
+  except ValueError:
+    raised = True
+  finally:
+    disable()
+
+  assert raised
+  assert get_stage_stats("failing").calls == 1
+  reset()
+
+
+@requires_reset_peak
+def test_stage__overlapping_threads__no_traced_peak():
+  started = Event()
+  finish = Event()
+
+  def run_other_stage():
+    with stage("other"):
+      started.set()
+      finish.wait(5)
+
+  enable(trace_memory=True)
+  reset()
+  thread = Thread(target=run_other_stage)
+  try:
+    thread.start()
+    try:
+      assert started.wait(5)
+      with stage("main"):
+        data = bytearray(1000000)
+      del data
+    finally:
+      finish.set()
+      thread.join(5)
+    assert not thread.is_alive()
+    with stage("alone"):
+      data = bytearray(1000000)
+    del data
+  finally:
+    disable()
+
+  assert get_stage_stats("main").traced_peak is None
+  assert get_stage_stats("other").traced_peak is None
+  assert get_stage_stats("alone").traced_peak >= 1000000
+  reset()
+
+
+@requires_reset_peak
+def test_stage__inner_reset__keeps_outer_peak():
+  enable(trace_memory=True)
+  reset()
+  try:
+    with stage("outer"):
+      data = bytearray(2000000)
+      del data
+      with stage("inner"):
+        pass
+  finally:
+    disable()
+
+  assert get_stage_stats("outer").traced_peak >= 2000000
+  assert get_stage_stats("inner").traced_peak < 2000000
+  reset()
@@ -0,0 +1,273 @@
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+from accent_analyser.app.io import (ARROW, PARQUET, TSV, get_file_format,
+                                    get_probabilities_cache_path,
+                                    open_rules_store, read_df,
+                                    read_probabilities_cache,
+                                    read_words_chunked, write_df,
+                                    write_probabilities_cache, write_rows)
+from accent_analyser.app.main import load_probabilities
+from pandas import DataFrame
+
+PROBABILITIES = {
+  ("a", "b"): [
+    (("a", "c"), 1),
+    (("a", "d"), 8),
+  ]
+}
+
+
+WORDS_DATA = {
+  "graphemes": ["How", "are", "", "you"],
+  "phonemes": ["hˈaʊ", "ˈɑɹ", "", "jˈu"],
+  "phones": ["xˈaʊ", "ˈɑ", "", "jˈu"],
+  "lang": ["eng", "eng", "eng", "eng"],
+  "speaker": ["a", "a", "b", "b"],
+}
+
+COLUMNS = [("Nr", int), ("Name", str), ("Occurrences (%)", float)]
+ROWS = [(1, "a", 12.5), (2, "b\tc", 100 / 3), (3, "", 0.0)]
+
+
+def write_probabilities_tsv(path: Path) -> None:
+  path.write_text("Phonemes\tPhones\tOccurrence\na b\ta c\t1\na b\ta d\t8\n", encoding="utf-8")
+
+# region read_probabilities_cache
+
+
+def test_read_probabilities_cache__roundtrip(tmp_path: Path):
+  path = tmp_path / "word_probs.csv"
+  write_probabilities_tsv(path)
+
+  write_probabilities_cache(path, PROBABILITIES)
+  res = read_probabilities_cache(path)
+
+  assert res == PROBABILITIES
+  assert set(tmp_path.iterdir()) == {path, get_probabilities_cache_path(path)}
+
+
+def test_read_probabilities_cache__missing(tmp_path: Path):
+  path = tmp_path / "word_probs.csv"
+  write_probabilities_tsv(path)
+
+  res = read_probabilities_cache(path)
+
+  assert res is None
+
+
+def test_read_probabilities_cache__source_changed(tmp_path: Path):
+  path = tmp_path / "word_probs.csv"
+  write_probabilities_tsv(path)
+  write_probabilities_cache(path, PROBABILITIES)
+  stat = path.stat()
+  os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+  res = read_probabilities_cache(path)
+
+  assert res is None
+
+
+def test_read_probabilities_cache__garbage__returns_none(tmp_path: Path):
+  path = tmp_path / "word_probs.csv"
+  write_probabilities_tsv(path)
+  get_probabilities_cache_path(path).write_bytes(b"no pickle")
+
+  res = read_probabilities_cache(path)
+
+  assert res is None
+
+
+def test_read_probabilities_cache__truncated__returns_none(tmp_path: Path):
+  path = tmp_path / "word_probs.csv"
+  write_probabilities_tsv(path)
+  write_probabilities_cache(path, PROBABILITIES)
+  cache_path = get_probabilities_cache_path(path)
+  cache_path.write_bytes(cache_path.read_bytes()[:-10])
+
+  res = read_probabilities_cache(path)
+
+  assert res is None
+
+# endregion
+
+# region load_probabilities
+
+
+def test_load_probabilities__writes_and_uses_cache(tmp_path: Path):
+  path = tmp_path / "word_probs.csv"
+  write_probabilities_tsv(path)
+
+  res1 = load_probabilities(path)
+  cached = read_probabilities_cache(path)
+  res2 = load_probabilities(path)
+
+  assert res1 == PROBABILITIES
+  assert cached == PROBABILITIES
+  assert res2 == PROBABILITIES
+
+
+def test_load_probabilities__garbage_cache__loads_tsv_and_rebuilds_cache(tmp_path: Path):
+  path = tmp_path / "word_probs.csv"
+  write_probabilities_tsv(path)
+  get_probabilities_cache_path(path).write_bytes(b"\x80\x05garbage")
+
+  res = load_probabilities(path)
+
+  assert res == PROBABILITIES
+  assert read_probabilities_cache(path) == PROBABILITIES
+
+
+def test_load_probabilities__without_cache(tmp_path: Path):
+  path = tmp_path / "word_probs.csv"
+  write_probabilities_tsv(path)
+
+  res = load_probabilities(path, use_cache=False)
+
+  assert res == PROBABILITIES
+  assert not get_probabilities_cache_path(path).exists()
+
+# endregion
+
+# region write_rows
+
+
+def test_write_rows__tsv_equals_to_csv(tmp_path: Path):
+  path = tmp_path / "rows.csv"
+  expected_path = tmp_path / "expected.csv"
+  df = DataFrame(
+    data=[(nr, name, f"{percent:.2f}") for nr, name, percent in ROWS],
+    columns=[name for name, _ in COLUMNS],
+  )
+  df.to_csv(expected_path, sep="\t", header=True, index=False)
+
+  write_rows(path, COLUMNS, iter(ROWS), buffer_size=2)
+
+  assert path.read_bytes() == expected_path.read_bytes()
+
+
+def test_write_rows__tsv_no_rows__writes_header(tmp_path: Path):
+  path = tmp_path / "rows.csv"
+
+  write_rows(path, COLUMNS, [])
+
+  assert path.read_text(encoding="utf-8") == "Nr\tName\tOccurrences (%)\n"
+
+
+def test_write_rows__parquet_keeps_numeric_columns(tmp_path: Path):
+  pq = pytest.importorskip("pyarrow.parquet")
+  path = tmp_path / "rows.parquet"
+
+  write_rows(path, COLUMNS, iter(ROWS), file_format=PARQUET, buffer_size=2)
+
+  file = pq.ParquetFile(str(path))
+  assert file.num_row_groups == 2
+  assert file.read().to_pylist() == [
+    {"Nr": nr, "Name": name, "Occurrences (%)": percent} for nr, name, percent in ROWS
+  ]
+
+
+def test_write_rows__arrow(tmp_path: Path):
+  pa = pytest.importorskip("pyarrow")
+  import pyarrow.ipc
+  path = tmp_path / "rows.arrow"
+
+  write_rows(path, COLUMNS, iter(ROWS), file_format=ARROW, buffer_size=2)
+
+  with pa.memory_map(str(path)) as source:
+    res = pa.ipc.open_file(source).read_all()
+  assert res.column("Occurrences (%)").to_pylist() == [percent for _, _, percent in ROWS]
+
+# endregion
+
+# region read_words_chunked
+
+
+def test_get_file_format__suffixes():
+  assert get_file_format(Path("a.csv")) == TSV
+  assert get_file_format(Path("a.tsv")) == TSV
+  assert get_file_format(Path("a.parquet")) == PARQUET
+  assert get_file_format(Path("a.ARROW")) == ARROW
+  assert get_file_format(Path("a.feather")) == ARROW
+
+
+def read_all_words(path: Path, chunksize: int):
+  res = []
+  for words in read_words_chunked(path, chunksize):
+    res.extend(words)
+  return res
+
+
+def test_read_words_chunked__parquet_equals_tsv(tmp_path: Path):
+  pytest.importorskip("pyarrow")
+  df = DataFrame(WORDS_DATA)
+  df.loc[2, "phones"] = None
+  tsv_path = tmp_path / "words.csv"
+  parquet_path = tmp_path / "words.parquet"
+  DataFrame(WORDS_DATA).to_csv(tsv_path, sep="\t")
+  df.to_parquet(parquet_path, row_group_size=2)
+
+  res = read_all_words(parquet_path, chunksize=3)
+
+  assert len(res) == 3
+  assert res == read_all_words(tsv_path, chunksize=3)
+
+
+def test_read_words_chunked__arrow_equals_tsv(tmp_path: Path):
+  pytest.importorskip("pyarrow")
+  tsv_path = tmp_path / "words.csv"
+  arrow_path = tmp_path / "words.arrow"
+  DataFrame(WORDS_DATA).to_csv(tsv_path, sep="\t")
+  DataFrame(WORDS_DATA).to_feather(arrow_path)
+
+  res = read_all_words(arrow_path, chunksize=3)
+
+  assert len(res) == 3
+  assert res == read_all_words(tsv_path, chunksize=3)
+
+# endregion
+
+# region read_df
+
+
+def test_read_df__tsv_roundtrip(tmp_path: Path):
+  path = tmp_path / "df.csv"
+  df = DataFrame({"Phonemes": ["a b"], "Occurrence": [2]})
+
+  write_df(path, df, TSV)
+  res = read_df(path)
+
+  assert res.equals(df)
+
+
+def test_read_df__parquet_roundtrip(tmp_path: Path):
+  pytest.importorskip("pyarrow")
+  path = tmp_path / "df.parquet"
+  df = DataFrame({"Phonemes": ["a b"], "Occurrence": [2]})
+
+  write_df(path, df, PARQUET)
+  res = read_df(path)
+
+  assert res.equals(df)
+
+# endregion
+
+# region open_rules_store
+
+
+def test_open_rules_store__no_path__yields_none():
+  with open_rules_store(None) as res:
+    assert res is None
+
+
+def test_open_rules_store__error__closes_store(tmp_path: Path):
+  with pytest.raises(ValueError):
+    with open_rules_store(tmp_path / "rules.sqlite") as store:
+      raise ValueError()
+
+  with pytest.raises(sqlite3.ProgrammingError):
+    len(store)
+
+# endregion
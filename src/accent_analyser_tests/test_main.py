@@ -0,0 +1,76 @@
+import json
+from pathlib import Path
+
+import pytest
+from accent_analyser.app.main import write_reports
+from accent_analyser.core.instrumentation import PROFILE_ENV_VAR, is_enabled
+from pandas import DataFrame, read_csv
+
+
+def write_words_tsv(path: Path) -> None:
+  DataFrame({
+    "graphemes": ["How", "How", "are"],
+    "phonemes": ["hˈaʊ", "hˈaʊ", "ˈɑɹ"],
+    "phones": ["xˈaʊ", "hˈaʊ", "ˈɑ"],
+    "lang": ["eng", "eng", "eng"],
+  }).to_csv(path, sep="\t")
+
+
+def test_write_reports__writes_all_reports_to_output_dir(tmp_path: Path):
+  input_path = tmp_path / "words.csv"
+  write_words_tsv(input_path)
+  output_dir = tmp_path / "reports" / "run1"
+
+  write_reports([input_path], output_dir)
+
+  assert sorted(path.name for path in output_dir.iterdir()) == [
+    "res_rule_stats.csv", "res_word_stats.csv", "word_probs.csv"]
+  word_stats = read_csv(output_dir / "res_word_stats.csv", sep="\t")
+  assert list(word_stats["Occurrences"]) == [1, 1, 1]
+  assert list(word_stats["Occurrences Total"]) == [1, 2, 2]
+
+
+def test_write_reports__missing_input__writes_nothing(tmp_path: Path):
+  output_dir = tmp_path / "reports"
+
+  write_reports([tmp_path / "missing.csv"], output_dir)
+
+  assert not output_dir.exists()
+
+
+def test_write_reports__profile__writes_profile(tmp_path: Path):
+  input_path = tmp_path / "words.csv"
+  write_words_tsv(input_path)
+
+  write_reports([input_path], tmp_path, profile=True)
+
+  profile = json.loads((tmp_path / "profile.json").read_text(encoding="utf-8"))
+  assert profile["counting"]["calls"] == 1
+  assert profile["rule_detection"]["calls"] == 1
+  assert profile["writing"]["calls"] == 3
+  profile_df = read_csv(tmp_path / "profile.csv", sep="\t")
+  assert set(profile_df["Stage"]) == set(profile.keys())
+  assert not is_enabled()
+
+
+def test_write_reports__profile_env_var__writes_profile(tmp_path: Path, monkeypatch):
+  input_path = tmp_path / "words.csv"
+  write_words_tsv(input_path)
+  monkeypatch.setenv(PROFILE_ENV_VAR, "1")
+
+  write_reports([input_path], tmp_path)
+
+  assert (tmp_path / "profile.json").exists()
+  assert not is_enabled()
+
+
+def test_write_reports__error__disables_profiling(tmp_path: Path):
+  input_path = tmp_path / "words.csv"
+  write_words_tsv(input_path)
+  output_dir = tmp_path / "file"
+  output_dir.write_text("", encoding="utf-8")
+
+  with pytest.raises(FileExistsError):
+    write_reports([input_path], output_dir, profile=True)
+
+  assert not is_enabled()
@@ -0,0 +1,16 @@
+from collections import OrderedDict
+from pathlib import Path
+
+from accent_analyser.app.main_cluster_rules import main
+
+
+def test_main__no_speakers__returns_empty_dict():
+  res = main([])
+
+  assert res == OrderedDict()
+
+
+def test_main__missing_path__returns_empty_dict(tmp_path: Path):
+  res = main([tmp_path / "missing.csv"])
+
+  assert res == OrderedDict()
@@ -0,0 +1,80 @@
+from accent_analyser.core.occurrences import Occurrences
+from accent_analyser.core.rule_detection import (WordEntry,
+                                                 get_phone_occurrences,
+                                                 get_phoneme_occurrences)
+
+WORD1 = WordEntry(
+  graphemes=("a",),
+  phonemes=("b",),
+  phones=("c",),
+)
+
+WORD2 = WordEntry(
+  graphemes=("a",),
+  phonemes=("b",),
+  phones=("d",),
+)
+
+WORD3 = WordEntry(
+  graphemes=("x",),
+  phonemes=("y",),
+  phones=("y",),
+)
+
+
+def test_init__equals_separate_counting():
+  words = [WORD3, WORD1, WORD2, WORD1, WORD3, WORD3]
+
+  res = Occurrences(words)
+
+  assert res.phone_occurrences == get_phone_occurrences(words)
+  assert list(res.phone_occurrences.keys()) == list(get_phone_occurrences(words).keys())
+  assert res.phoneme_occurrences == get_phoneme_occurrences(words)
+  assert list(res.phoneme_occurrences.keys()) == list(get_phoneme_occurrences(words).keys())
+  assert len(res) == 3
+  assert res.total == 6
+
+
+def test_add__batches_are_accumulated():
+  res = Occurrences([WORD1])
+
+  res.add([WORD2, WORD1])
+
+  assert res.phone_occurrences == {WORD1: 2, WORD2: 1}
+  assert res.phoneme_occurrences == {(("a",), ("b",)): 3}
+
+
+def test_remove__decreases_counts():
+  res = Occurrences([WORD1, WORD1, WORD2])
+
+  res.remove([WORD1])
+
+  assert res.phone_occurrences == {WORD1: 1, WORD2: 1}
+  assert res.phoneme_occurrences == {(("a",), ("b",)): 2}
+
+
+def test_remove__zero_counts_are_deleted():
+  res = Occurrences([WORD1, WORD2])
+
+  res.remove([WORD1, WORD2])
+
+  assert len(res.phone_occurrences) == 0
+  assert len(res.phoneme_occurrences) == 0
+
+
+def test_update__adds_other_counts():
+  res = Occurrences([WORD1])
+
+  res.update(Occurrences([WORD1, WORD3]))
+
+  assert res.phone_occurrences == {WORD1: 2, WORD3: 1}
+  assert res.phoneme_occurrences == {(("a",), ("b",)): 2, (("x",), ("y",)): 1}
+
+
+def test_add_count__adds_count_to_both_tables():
+  res = Occurrences([WORD1])
+
+  res.add_count(WORD2, 3)
+
+  assert res.phone_occurrences == {WORD1: 1, WORD2: 3}
+  assert res.phoneme_occurrences == {(("a",), ("b",)): 4}
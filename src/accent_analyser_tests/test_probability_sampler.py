@@ -0,0 +1,108 @@
+from collections import Counter
+
+import numpy as np
+from accent_analyser.core.probability_sampler import (ProbabilitySampler,
+                                                      get_alias_table)
+
+
+def get_alias_probabilities(thresholds, aliases) -> np.ndarray:
+  res = np.zeros(len(thresholds))
+  for column, (threshold, alias) in enumerate(zip(thresholds, aliases)):
+    res[column] += threshold / len(thresholds)
+    res[alias] += (1 - threshold) / len(thresholds)
+  return res
+
+# region get_alias_table
+
+
+def test_get_alias_table__represents_weights():
+  weights = [3, 1, 6, 10]
+
+  thresholds, aliases = get_alias_table(weights)
+
+  np.testing.assert_allclose(get_alias_probabilities(thresholds, aliases), [0.15, 0.05, 0.3, 0.5])
+
+
+def test_get_alias_table__zero_weight_is_never_drawn():
+  weights = [0, 2, 2]
+
+  thresholds, aliases = get_alias_table(weights)
+
+  assert thresholds[0] == 0
+  np.testing.assert_allclose(get_alias_probabilities(thresholds, aliases), [0, 0.5, 0.5])
+
+
+def test_get_alias_table__one_entry():
+  thresholds, aliases = get_alias_table([5])
+
+  assert thresholds == [1.0]
+  assert aliases == [0]
+
+# endregion
+
+# region ProbabilitySampler
+
+
+def get_test_probabilities():
+  res = {
+    ("a", "b"): [
+      (("a", "c"), 1),
+      (("a", "d"), 9),
+    ],
+    ("x",): [
+      (("y",), 1),
+    ],
+  }
+  return res
+
+
+def test_sample__one_entry():
+  sampler = ProbabilitySampler(get_test_probabilities(), seed=0)
+
+  res = sampler.sample(("x",))
+
+  assert res == ("y",)
+
+
+def test_sample__respects_probabilities():
+  sampler = ProbabilitySampler(get_test_probabilities(), seed=0)
+
+  res = Counter(sampler.sample(("a", "b")) for _ in range(10000))
+
+  deviation = 0.01
+  assert set(res) == {("a", "c"), ("a", "d")}
+  assert 0.1 - deviation <= res[("a", "c")] / 10000 <= 0.1 + deviation
+
+
+def test_sample_many__respects_probabilities_per_symbols():
+  sampler = ProbabilitySampler(get_test_probabilities(), seed=0)
+  symbols = [("a", "b"), ("x",)] * 5000
+
+  res = sampler.sample_many(symbols)
+
+  assert len(res) == 10000
+  assert all(x == ("y",) for x in res[1::2])
+  amount_of_ac = len([x for x in res[::2] if x == ("a", "c")]) / 5000
+  deviation = 0.015
+  assert 0.1 - deviation <= amount_of_ac <= 0.1 + deviation
+
+
+def test_seed__reproducible():
+  sampler = ProbabilitySampler(get_test_probabilities(), seed=1)
+  symbols = [("a", "b")] * 100
+  res1 = ([sampler.sample(x) for x in symbols], sampler.sample_many(symbols))
+
+  sampler.seed(1)
+  res2 = ([sampler.sample(x) for x in symbols], sampler.sample_many(symbols))
+
+  assert res1 == res2
+
+
+def test_contains_len():
+  sampler = ProbabilitySampler(get_test_probabilities())
+
+  assert len(sampler) == 2
+  assert ("x",) in sampler
+  assert ("y",) not in sampler
+
+# endregion
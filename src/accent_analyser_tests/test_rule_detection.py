@@ -1,17 +1,33 @@
+import pickle
 from collections import OrderedDict
+from dataclasses import FrozenInstanceError
 
-from accent_analyser.core.rule_detection import (UNCHANGED_RULE, Change,
-                                                 ChangeType, Rule, RuleType,
-                                                 WordEntry,
+import pytest
+
+from accent_analyser.core.rule_detection import (RULE_DETECTION_VERSION,
+                                                 UNCHANGED_RULE, Change,
+                                                 ChangeType, Rule, RulesCache,
+                                                 RuleType,
+                                                 WordEntry, add_phone_occurrences,
+                                                 add_phoneme_occurrences,
                                                  changes_cluster_to_rule,
                                                  cluster_changes,
                                                  clustered_changes_to_rules,
-                                                 df_to_data, get_changes,
+                                                 df_to_data,
+                                                 df_to_data_columnar,
+                                                 get_changes,
                                                  get_phone_occurrences,
                                                  get_phoneme_occurrences,
                                                  get_rules_from_words,
+                                                 get_rules_store_key,
+                                                 get_word_rules,
+                                                 get_word_rules_parallel,
                                                  positions_to_str, rule_to_str,
-                                                 rules_to_str)
+                                                 rules_to_str,
+                                                 word_rules_from_bytes,
+                                                 word_rules_to_bytes)
+from accent_analyser.core.rules_store import RulesStore
+from accent_analyser.core.symbol_table import SymbolTable
 from ordered_set import OrderedSet
 from pandas.core.frame import DataFrame
 from text_utils import Language
@@ -34,6 +50,75 @@ def test_df_to_data():
   assert res[0].phones == ("c",)
 
 
+# region df_to_data_columnar
+
+
+def test_df_to_data_columnar():
+  df = DataFrame(
+    data=[
+      ("A ", "b ", "c ", "eng"),
+    ],
+    columns=["graphemes", "phonemes", "phones", "lang"],
+  )
+
+  res = df_to_data_columnar(df)
+
+  assert len(res) == 1
+  assert res[0].graphemes == ("a",)
+  assert res[0].phonemes == ("b",)
+  assert res[0].phones == ("c",)
+
+
+def test_df_to_data_columnar__empty_entries_are_removed():
+  df = DataFrame(
+    data=[
+      (" ", "", ".", "eng"),
+      ("a", "b", "c", "eng"),
+    ],
+    columns=["graphemes", "phonemes", "phones", "lang"],
+  )
+
+  res = df_to_data_columnar(df)
+
+  assert len(res) == 1
+  assert res[0].graphemes == ("a",)
+
+
+def test_df_to_data_columnar__equals_df_to_data():
+  df = DataFrame(
+    data=[
+      ("The", "ðə", "də", "eng"),
+      ("cat,", "kæt", "kæt", "eng"),
+      ("the", "ðə", "ðə", "eng"),
+      ("The", "ðə", "də", "eng"),
+      ("", "", "", "eng"),
+    ],
+    columns=["graphemes", "phonemes", "phones", "lang"],
+  )
+
+  res = df_to_data_columnar(df)
+
+  assert res == df_to_data(df)
+
+
+def test_df_to_data_columnar__same_strings_share_symbols():
+  df = DataFrame(
+    data=[
+      ("a", "b", "c", "eng"),
+      ("a", "b", "c", "eng"),
+    ],
+    columns=["graphemes", "phonemes", "phones", "lang"],
+  )
+
+  res = df_to_data_columnar(df)
+
+  assert len(res) == 2
+  assert res[0].phonemes is res[1].phonemes
+
+
+# endregion
+
+
 def test_rule_hash__same_content_is_equal():
   rule1 = Rule(
     rule_type=RuleType.INSERTION,
@@ -48,6 +133,78 @@ def test_rule_hash__same_content_is_equal():
   )
 
   assert rule1 == rule2
+  assert hash(rule1) == hash(rule2)
+
+
+def test_rule__pickle__keeps_equality_and_hash():
+  rule1 = Rule(
+    rule_type=RuleType.SUBSTITUTION,
+    from_symbols=("a",),
+    to_symbols=("b",),
+  )
+
+  res = pickle.loads(pickle.dumps(rule1))
+
+  assert res == rule1
+  assert hash(res) == hash(rule1)
+
+
+def test_word_entry__has_no_instance_dict():
+  word1 = WordEntry(
+    graphemes=("a",),
+    phonemes=("b",),
+    phones=("c",),
+  )
+
+  assert not hasattr(word1, "__dict__")
+
+
+def test_word_entry__pickle__keeps_equality_and_hash():
+  word1 = WordEntry(
+    graphemes=("a",),
+    phonemes=("b",),
+    phones=("c",),
+  )
+
+  res = pickle.loads(pickle.dumps(word1))
+
+  assert res == word1
+  assert hash(res) == hash(word1)
+
+
+def test_word_entry__assignment__raises():
+  word1 = WordEntry(
+    graphemes=("a",),
+    phonemes=("b",),
+    phones=("c",),
+  )
+
+  with pytest.raises(FrozenInstanceError):
+    word1.phones = ("d",)
+
+
+def test_rule__assignment__raises():
+  rule1 = Rule(
+    rule_type=RuleType.INSERTION,
+    from_symbols=(),
+    to_symbols=("a",),
+  )
+
+  with pytest.raises(FrozenInstanceError):
+    rule1.to_symbols = ("b",)
+
+
+def test_df_to_data_columnar__symbol_table__interns_across_columns():
+  df = DataFrame(
+    data=[
+      ("a", "bc", "bc", "eng"),
+    ],
+    columns=["graphemes", "phonemes", "phones", "lang"],
+  )
+
+  res = df_to_data_columnar(df, SymbolTable())
+
+  assert res[0].phonemes is res[0].phones
 
 
 # region get_ndiff_info
@@ -632,6 +789,54 @@ def test_get_phoneme_occurrences__two_different_phonemes__return_one_for_each():
   assert res[(("a",), ("c",))] == 1
 
 
+# endregion
+
+# region add_occurrences
+
+
+def test_add_phone_occurrences__counts_are_accumulated():
+  word1 = WordEntry(
+    graphemes=("a",),
+    phonemes=("b",),
+    phones=("c",),
+  )
+  word2 = WordEntry(
+    graphemes=("a",),
+    phonemes=("b",),
+    phones=("d",),
+  )
+  res = OrderedDict()
+
+  add_phone_occurrences(res, [word1])
+  add_phone_occurrences(res, [word2, word1])
+
+  assert res == OrderedDict({
+    word1: 2,
+    word2: 1,
+  })
+
+
+def test_add_phoneme_occurrences__counts_are_accumulated():
+  word1 = WordEntry(
+    graphemes=("a",),
+    phonemes=("b",),
+    phones=("c",),
+  )
+  word2 = WordEntry(
+    graphemes=("a",),
+    phonemes=("b",),
+    phones=("d",),
+  )
+  res = OrderedDict()
+
+  add_phoneme_occurrences(res, [word1])
+  add_phoneme_occurrences(res, [word2])
+
+  assert res == OrderedDict({
+    (("a",), ("b",)): 2,
+  })
+
+
 # endregion
 
 # region get_rules_from_words
@@ -692,3 +897,160 @@ def test_get_rules__two_words():
   assert res[word2][(0,)].to_symbols == ("c",)
 
 # endregion
+
+
+# region RulesCache
+
+
+def test_rules_cache__repeated_pair__is_hit():
+  cache = RulesCache()
+
+  res1 = cache.get_word_rules(("a",), ("b",))
+  res2 = cache.get_word_rules(("a",), ("b",))
+
+  assert res1 is res2
+  assert cache.hits == 1
+  assert cache.misses == 1
+  assert len(cache) == 1
+
+
+def test_rules_cache__max_size__evicts_least_recently_used():
+  cache = RulesCache(max_size=2)
+
+  cache.get_word_rules(("a",), ("b",))
+  cache.get_word_rules(("a",), ("c",))
+  cache.get_word_rules(("a",), ("b",))
+  cache.get_word_rules(("a",), ("d",))
+  cache.get_word_rules(("a",), ("b",))
+  cache.get_word_rules(("a",), ("c",))
+
+  assert len(cache) == 2
+  assert cache.hits == 2
+  assert cache.misses == 4
+
+
+def test_get_rules_from_words__shared_cache__homographs_are_hits():
+  word1 = WordEntry(
+      graphemes=("a",),
+      phonemes=("a",),
+      phones=("b",),
+    )
+
+  word2 = WordEntry(
+      graphemes=("x",),
+      phonemes=("a",),
+      phones=("b",),
+    )
+  cache = RulesCache()
+
+  res1 = get_rules_from_words(OrderedSet([word1, word2]), cache)
+  res2 = get_rules_from_words(OrderedSet([word1]), cache)
+
+  assert res1[word1] == res1[word2] == res2[word1] == get_word_rules(("a",), ("b",))
+  assert cache.hits == 2
+  assert cache.misses == 1
+
+
+# endregion
+
+
+def test_rules_cache__get_missing__returns_distinct_uncached_pairs():
+  cache = RulesCache()
+  cache.get_word_rules(("a",), ("b",))
+
+  res = cache.get_missing([(("a",), ("b",)), (("a",), ("c",)), (("a",), ("c",))])
+
+  assert res == [(("a",), ("c",))]
+
+
+def test_rules_cache__add__is_hit():
+  cache = RulesCache()
+  rules = get_word_rules(("a",), ("b",))
+
+  cache.add(("a",), ("b",), rules)
+  res = cache.get_word_rules(("a",), ("b",))
+
+  assert res is rules
+  assert cache.hits == 1
+  assert cache.misses == 0
+
+
+def test_get_rules_from_words__parallel__equals_serial():
+  words = OrderedSet()
+  for i in range(30):
+    words.add(WordEntry(
+      graphemes=(str(i),),
+      phonemes=("a", "b", str(i % 7)),
+      phones=("a", str(i % 5)),
+    ))
+
+  res = get_rules_from_words(words, n_jobs=2, chunksize=4, min_parallel_size=0)
+
+  assert list(res.keys()) == list(words)
+  assert res == get_rules_from_words(words)
+
+
+def test_get_word_rules_parallel__keeps_order():
+  pairs = [(("a",), ("b",)), (("a",), ("a",)), (("a", "c"), ("c",))]
+
+  res = get_word_rules_parallel(pairs, n_jobs=2, chunksize=1)
+
+  assert res == [get_word_rules(*pair) for pair in pairs]
+
+
+# region persisted rules
+
+
+def test_word_rules_from_bytes__restores_word_rules():
+  rules = get_word_rules(("h", "o", "w", "a"), ("x", "o", "a", "b"))
+
+  res = word_rules_from_bytes(word_rules_to_bytes(rules))
+
+  assert res == rules
+  assert list(res.keys()) == list(rules.keys())
+
+
+def test_get_rules_store_key__different_splits__are_different():
+  res1 = get_rules_store_key(("a", "b"), ("c",))
+  res2 = get_rules_store_key(("a",), ("b", "c"))
+
+  assert res1 != res2
+
+
+def test_rules_cache__with_store__loads_persisted_rules(tmp_path):
+  word1 = WordEntry(
+      graphemes=("a",),
+      phonemes=("a",),
+      phones=("b",),
+    )
+  path = tmp_path / "rules.sqlite"
+
+  with RulesStore(path, RULE_DETECTION_VERSION) as store:
+    cache1 = RulesCache(store=store)
+    res1 = get_rules_from_words(OrderedSet([word1]), cache1)
+
+  with RulesStore(path, RULE_DETECTION_VERSION) as store:
+    cache2 = RulesCache(store=store)
+    res2 = get_rules_from_words(OrderedSet([word1]), cache2)
+
+  assert res1 == res2
+  assert cache1.store_hits == 0
+  assert cache2.store_hits == 1
+
+
+def test_rules_cache__get_missing__with_store__loads_only_stored_pairs(tmp_path):
+  path = tmp_path / "rules.sqlite"
+  stored = (("a",), ("b",))
+  with RulesStore(path, RULE_DETECTION_VERSION) as store:
+    RulesCache(store=store).add(*stored, get_word_rules(*stored))
+
+  with RulesStore(path, RULE_DETECTION_VERSION) as store:
+    cache = RulesCache(store=store)
+    res = cache.get_missing([stored, (("a",), ("c",)), stored])
+
+  assert res == [(("a",), ("c",))]
+  assert cache.store_hits == 1
+  assert len(cache) == 1
+
+
+# endregion
@@ -0,0 +1,105 @@
+from collections import Counter, OrderedDict
+
+from accent_analyser.core.rule_detection import Rule, RuleType, WordEntry
+from accent_analyser.core.rule_sampler import (RuleSampler,
+                                               get_rule_probabilities)
+
+RULE_OMIT_T = Rule(
+  rule_type=RuleType.OMISSION,
+  from_symbols=("t",),
+  to_symbols=(),
+)
+
+RULE_TH_TO_D = Rule(
+  rule_type=RuleType.SUBSTITUTION,
+  from_symbols=("θ",),
+  to_symbols=("d",),
+)
+
+RULE_TH_TO_S = Rule(
+  rule_type=RuleType.SUBSTITUTION,
+  from_symbols=("θ",),
+  to_symbols=("s",),
+)
+
+RULE_ST_TO_SS = Rule(
+  rule_type=RuleType.SUBSTITUTION,
+  from_symbols=("s", "t"),
+  to_symbols=("s", "s"),
+)
+
+RULE_INSERT_E = Rule(
+  rule_type=RuleType.INSERTION,
+  from_symbols=(),
+  to_symbols=("e",),
+)
+
+# region get_rule_probabilities
+
+
+def test_get_rule_probabilities__divides_by_pattern_occurrences():
+  word1 = WordEntry(graphemes=("x",), phonemes=("t", "a", "t"), phones=("t", "a"))
+  word2 = WordEntry(graphemes=("x",), phonemes=("t", "a", "t"), phones=("t", "a", "t"))
+  word3 = WordEntry(graphemes=("y",), phonemes=("e",), phones=("e", "e"))
+  word_rules = OrderedDict([
+    (word1, OrderedDict([((2,), RULE_OMIT_T)])),
+    (word2, OrderedDict()),
+    (word3, OrderedDict([((1,), RULE_INSERT_E)])),
+  ])
+  phone_occurrences = Counter({word1: 1, word2: 3, word3: 2})
+  phoneme_occurrences = Counter({(("x",), ("t", "a", "t")): 4, (("y",), ("e",)): 2})
+
+  res = get_rule_probabilities(word_rules, phone_occurrences, phoneme_occurrences)
+
+  assert res == OrderedDict([(RULE_OMIT_T, 1 / 8)])
+
+# endregion
+
+# region RuleSampler
+
+
+def test_sample__probability_one_applies_all_matches():
+  sampler = RuleSampler({RULE_OMIT_T: 1.0, RULE_TH_TO_D: 1.0}, seed=0)
+
+  res = sampler.sample(("θ", "a", "t", "t"))
+
+  assert res == ("d", "a")
+
+
+def test_sample__probability_zero_keeps_unseen_word():
+  sampler = RuleSampler({RULE_OMIT_T: 0.0}, seed=0)
+
+  res = sampler.sample(("t", "a", "t"))
+
+  assert res == ("t", "a", "t")
+
+
+def test_sample__longer_match_first():
+  sampler = RuleSampler({RULE_OMIT_T: 1.0, RULE_ST_TO_SS: 1.0}, seed=0)
+
+  res = sampler.sample(("s", "t", "a", "t"))
+
+  assert res == ("s", "s", "a")
+
+
+def test_sample__respects_probabilities():
+  sampler = RuleSampler({RULE_TH_TO_D: 0.2, RULE_TH_TO_S: 0.3}, seed=0)
+
+  res = Counter(sampler.sample(("θ",)) for _ in range(10000))
+
+  deviation = 0.02
+  assert set(res) == {("d",), ("s",), ("θ",)}
+  assert 0.2 - deviation <= res[("d",)] / 10000 <= 0.2 + deviation
+  assert 0.3 - deviation <= res[("s",)] / 10000 <= 0.3 + deviation
+
+
+def test_sample__seed_is_reproducible():
+  sampler = RuleSampler({RULE_TH_TO_D: 0.5}, seed=1)
+  res1 = [sampler.sample(("θ", "θ", "θ")) for _ in range(20)]
+
+  sampler.seed(1)
+  res2 = [sampler.sample(("θ", "θ", "θ")) for _ in range(20)]
+
+  assert res1 == res2
+
+# endregion
@@ -0,0 +1,102 @@
+from accent_analyser.core.rule_detection import Rule, RuleType
+from accent_analyser.core.rule_set import (RewriteRule, RuleSet,
+                                           get_rewrite_rules)
+
+# region get_rewrite_rules
+
+
+def test_get_rewrite_rules__skips_insertions():
+  rules = [
+    Rule(rule_type=RuleType.OMISSION, from_symbols=("t",), to_symbols=()),
+    Rule(rule_type=RuleType.INSERTION, from_symbols=(), to_symbols=("e",)),
+    Rule(rule_type=RuleType.SUBSTITUTION, from_symbols=("θ",), to_symbols=("s",)),
+  ]
+
+  res = get_rewrite_rules(rules)
+
+  assert res == [
+    RewriteRule(from_symbols=("t",), to_symbols=()),
+    RewriteRule(from_symbols=("θ",), to_symbols=("s",)),
+  ]
+
+# endregion
+
+# region RuleSet
+
+
+def test_apply__all_rules_in_one_scan():
+  rule_set = RuleSet([
+    RewriteRule(from_symbols=("v",), to_symbols=("w",)),
+    RewriteRule(from_symbols=("θ",), to_symbols=("s",)),
+    RewriteRule(from_symbols=("ð",), to_symbols=("d",)),
+  ])
+
+  res = rule_set.apply(("ð", "ə", " ", "v", "ɪ", "θ"))
+
+  assert res == ("d", "ə", " ", "w", "ɪ", "s")
+
+
+def test_apply__replacements_are_not_rewritten():
+  rule_set = RuleSet([
+    RewriteRule(from_symbols=("a",), to_symbols=("b",)),
+    RewriteRule(from_symbols=("b",), to_symbols=("c",)),
+  ])
+
+  res = rule_set.apply(("a", "b"))
+
+  assert res == ("b", "c")
+
+
+def test_apply__leftmost_then_longest_then_first_listed():
+  rule_set = RuleSet([
+    RewriteRule(from_symbols=("b", "c"), to_symbols=("x",)),
+    RewriteRule(from_symbols=("a", "b"), to_symbols=("y",)),
+    RewriteRule(from_symbols=("a", "b", "c"), to_symbols=("z",)),
+    RewriteRule(from_symbols=("a", "b", "c"), to_symbols=("q",)),
+  ])
+
+  assert rule_set.apply(("a", "b", "c")) == ("z",)
+  assert rule_set.apply(("a", "b", "d")) == ("y", "d")
+  assert rule_set.apply(("d", "b", "c")) == ("d", "x")
+
+
+def test_apply__word_final():
+  rule_set = RuleSet([
+    RewriteRule(from_symbols=("s", "t"), to_symbols=("s",), word_final=True),
+  ])
+
+  res = rule_set.apply(("f", "s", "t", " ", "s", "t", "ɑ", "p", " ", "l", "ɪ", "s", "t", "."))
+
+  assert res == ("f", "s", " ", "s", "t", "ɑ", "p", " ", "l", "ɪ", "s", ".")
+
+
+def test_apply__word_initial():
+  rule_set = RuleSet([
+    RewriteRule(from_symbols=("h",), to_symbols=(), word_initial=True),
+  ])
+
+  res = rule_set.apply(("h", "a", "h", " ", "h", "i"))
+
+  assert res == ("a", "h", " ", "i")
+
+
+def test_apply__anchor_not_met__falls_back_to_next_rule():
+  rule_set = RuleSet([
+    RewriteRule(from_symbols=("t",), to_symbols=(), word_final=True),
+    RewriteRule(from_symbols=("t",), to_symbols=("d",)),
+  ])
+
+  res = rule_set.apply(("t", "a", "t"))
+
+  assert res == ("d", "a")
+
+
+def test_apply__no_rules():
+  rule_set = RuleSet([])
+
+  res = rule_set.apply(("a",))
+
+  assert len(rule_set) == 0
+  assert res == ("a",)
+
+# endregion
@@ -1,8 +1,9 @@
 from collections import OrderedDict
 
 from accent_analyser.core.rule_detection import Rule, RuleType, WordEntry
-from accent_analyser.core.rule_stats import (get_rule_stats, rule_stats_to_df,
-                                             sort_rule_stats)
+from accent_analyser.core.rule_stats import (get_rule_stats, iter_rule_stats,
+                                             rule_stats_to_df, sort_rule_stats,
+                                             word_rules_to_rules_dict)
 
 
 def test_get_rule_stats__one_word_one_rule():
@@ -85,3 +86,96 @@ def test_sort_rule_stats_df():
   assert resulting_csv_data[1] == (1, "ruleC", "a", "b", "c", "ruleC", 2, 4, "75.00")
   assert resulting_csv_data[2] == (1, "ruleB", "a", "b", "a", "ruleB", 1, 4, "75.00")
   assert resulting_csv_data[3] == (1, "ruleA", "a", "b", "b", "ruleA", 1, 4, "75.00")
+
+
+def test_word_rules_to_rules_dict__unchanged_words_are_listed_under_none():
+  word1 = WordEntry(
+    graphemes=("a",),
+    phonemes=("b",),
+    phones=("b",),
+  )
+
+  res = word_rules_to_rules_dict(OrderedDict({word1: OrderedDict()}))
+
+  assert res == OrderedDict({None: [word1]})
+
+
+def test_word_rules_to_rules_dict__rule_of_multiple_words():
+  word1 = WordEntry(
+    graphemes=("a",),
+    phonemes=("b",),
+    phones=("c",),
+  )
+
+  word2 = WordEntry(
+    graphemes=("b",),
+    phonemes=("b", "b"),
+    phones=("c", "c"),
+  )
+
+  rule1 = Rule(
+    rule_type=RuleType.SUBSTITUTION,
+    from_symbols=("b",),
+    to_symbols=("c",),
+  )
+
+  rule2 = Rule(
+    rule_type=RuleType.OMISSION,
+    from_symbols=("b",),
+    to_symbols=(),
+  )
+
+  word_rules = OrderedDict({
+    word1: OrderedDict({(0,): rule1}),
+    word2: OrderedDict({(0,): rule2, (1,): rule1}),
+  })
+
+  res = word_rules_to_rules_dict(word_rules)
+
+  assert list(res.keys()) == [None, rule1, rule2]
+  assert res[None] == []
+  assert res[rule1] == [word1, word2]
+  assert res[rule2] == [word2]
+
+
+def test_word_rules_to_rules_dict__same_rule_twice_in_word__word_is_listed_once():
+  word1 = WordEntry(
+    graphemes=("a",),
+    phonemes=("b", "a", "b"),
+    phones=("c", "a", "c"),
+  )
+
+  rule1 = Rule(
+    rule_type=RuleType.SUBSTITUTION,
+    from_symbols=("b",),
+    to_symbols=("c",),
+  )
+
+  word_rules = OrderedDict({
+    word1: OrderedDict({(0,): rule1, (2,): rule1}),
+  })
+
+  res = word_rules_to_rules_dict(word_rules)
+
+  assert res[rule1] == [word1]
+
+
+def test_iter_rule_stats__equals_get_rule_stats_with_numeric_percentages():
+  word1 = WordEntry(graphemes=("a",), phonemes=("b",), phones=("c",))
+  word2 = WordEntry(graphemes=("a",), phonemes=("b",), phones=("b",))
+  word3 = WordEntry(graphemes=("a",), phonemes=("a",), phones=("d",))
+  rule1 = Rule(rule_type=RuleType.INSERTION, from_symbols=(), to_symbols=("a",))
+  rule2 = Rule(rule_type=RuleType.OMISSION, from_symbols=("a",), to_symbols=())
+  word_rules = OrderedDict({
+    word1: OrderedDict({(0,): rule2, (1,): rule1}),
+    word2: OrderedDict(),
+    word3: OrderedDict({(1,): rule1}),
+  })
+  phone_occurrences = OrderedDict({word1: 1, word2: 2, word3: 3})
+
+  res = list(iter_rule_stats(word_rules, phone_occurrences))
+
+  expected = get_rule_stats(word_rules, phone_occurrences)
+  assert [row[:-1] for row in res] == [row[:-1] for row in expected]
+  assert [f"{row[-1]:.2f}" for row in res] == [row[-1] for row in expected]
+  assert res[1][-1] == 75.0
@@ -0,0 +1,51 @@
+from accent_analyser.core.rules_store import RulesStore
+
+
+def test_get__missing_key__returns_none(tmp_path):
+  with RulesStore(tmp_path / "rules.sqlite", version="1") as store:
+    res = store.get("a")
+
+  assert res is None
+
+
+def test_put__is_persisted(tmp_path):
+  path = tmp_path / "rules.sqlite"
+  with RulesStore(path, version="1") as store:
+    store.put("a", b"b")
+
+  with RulesStore(path, version="1") as store:
+    res = store.get("a")
+    assert len(store) == 1
+
+  assert res == b"b"
+
+
+def test_put__same_key__is_replaced(tmp_path):
+  with RulesStore(tmp_path / "rules.sqlite", version="1") as store:
+    store.put("a", b"b")
+    store.put("a", b"c")
+
+    assert len(store) == 1
+    assert store.get("a") == b"c"
+
+
+def test_init__other_version__drops_entries(tmp_path):
+  path = tmp_path / "rules.sqlite"
+  with RulesStore(path, version="1") as store:
+    store.put("a", b"b")
+
+  with RulesStore(path, version="2") as store:
+    res = store.get("a")
+    assert len(store) == 0
+
+  assert res is None
+
+
+def test_get_many__returns_stored_keys_only(tmp_path):
+  with RulesStore(tmp_path / "rules.sqlite", version="1") as store:
+    for i in range(5):
+      store.put(str(i), bytes([i]))
+
+    res = store.get_many(["0", "3", "x", "4", "3"], chunksize=2)
+
+  assert res == {"0": b"\x00", "3": b"\x03", "4": b"\x04"}
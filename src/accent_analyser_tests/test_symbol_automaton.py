@@ -0,0 +1,61 @@
+import random
+
+from accent_analyser.core.symbol_automaton import SymbolAutomaton
+
+
+def test_iter_matches__overlapping_patterns():
+  automaton = SymbolAutomaton([("a", "b"), ("b",), ("a", "b", "c"), ("c", "a")])
+
+  res = list(automaton.iter_matches(("a", "b", "c", "a", "b")))
+
+  assert res == [
+    (0, 2, 0),
+    (1, 2, 1),
+    (0, 3, 2),
+    (2, 4, 3),
+    (3, 5, 0),
+    (4, 5, 1),
+  ]
+
+
+def test_iter_matches__no_patterns():
+  automaton = SymbolAutomaton([])
+
+  res = list(automaton.iter_matches(("a", "b")))
+
+  assert len(automaton) == 0
+  assert res == []
+
+
+def test_iter_matches__multi_character_symbols():
+  automaton = SymbolAutomaton([("aɪ", "t")])
+
+  res = list(automaton.iter_matches(("a", "ɪ", "t", "aɪ", "t")))
+
+  assert res == [(3, 5, 0)]
+
+
+def test_iter_matches__equals_brute_force():
+  rnd = random.Random(1234)
+  for _ in range(500):
+    patterns = [tuple(rnd.choices("abc", k=rnd.randint(1, 4))) for _ in range(rnd.randint(1, 6))]
+    symbols = tuple(rnd.choices("abc", k=rnd.randint(0, 15)))
+    automaton = SymbolAutomaton(patterns)
+
+    res = sorted(automaton.iter_matches(symbols))
+
+    expected = sorted(
+      (start, start + len(pattern), pattern_id)
+      for pattern_id, pattern in enumerate(patterns)
+      for start in range(len(symbols) - len(pattern) + 1)
+      if symbols[start:start + len(pattern)] == pattern
+    )
+    assert res == expected
+
+
+def test_count_matches():
+  automaton = SymbolAutomaton([("a", "a"), ("b",)])
+
+  res = automaton.count_matches(("a", "a", "a", "c"))
+
+  assert res == {0: 2}
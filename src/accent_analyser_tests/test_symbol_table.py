@@ -0,0 +1,42 @@
+from accent_analyser.core.symbol_table import SymbolTable
+
+
+def test_get_id__new_symbols__get_consecutive_ids():
+  table = SymbolTable()
+
+  res = [table.get_id("a"), table.get_id("b"), table.get_id("a")]
+
+  assert res == [0, 1, 0]
+  assert len(table) == 2
+  assert table.symbols == ["a", "b"]
+
+
+def test_encode_decode__returns_symbols():
+  table = SymbolTable()
+
+  codes = table.encode(("a", "bc", "a"))
+  res = table.decode(codes)
+
+  assert list(codes) == [0, 1, 0]
+  assert res == ("a", "bc", "a")
+
+
+def test_intern__equal_tuples__return_same_object():
+  table = SymbolTable()
+  symbols1 = tuple(["a", "".join(["b", "c"])])
+  symbols2 = tuple(["a", "".join(["b", "c"])])
+
+  res1 = table.intern(symbols1)
+  res2 = table.intern(symbols2)
+
+  assert res1 == symbols1
+  assert res1 is res2
+  assert res1[1] is table.get_symbol(table.get_id("bc"))
+
+
+def test_contains():
+  table = SymbolTable()
+  table.get_id("a")
+
+  assert "a" in table
+  assert "b" not in table
@@ -3,8 +3,9 @@ from collections import OrderedDict
 
 from accent_analyser.core.rule_detection import WordEntry
 from accent_analyser.core.word_probabilities import (
-    check_probabilities_are_valid, get_probabilities, parse_probabilities_df,
-    probabilities_to_df, replace_with_prob, symbols_to_str_with_space)
+    check_probabilities_are_valid, get_probabilities, get_probabilities_df,
+    parse_probabilities_df, probabilities_to_df, replace_with_prob,
+    symbols_to_str_with_space)
 from pandas import DataFrame
 
 
@@ -129,6 +130,71 @@ def test_get_probabilities__adds_spaces():
 
 # endregion
 
+# region get_probabilities_df
+
+
+def test_get_probabilities_df__totals_and_probabilities_per_phonemes():
+  word1 = WordEntry(
+    graphemes=("a",),
+    phonemes=("b", "c"),
+    phones=("b",),
+  )
+  word2 = WordEntry(
+    graphemes=("a",),
+    phonemes=("b", "c"),
+    phones=("b", "c"),
+  )
+  word3 = WordEntry(
+    graphemes=("x",),
+    phonemes=("b", "c"),
+    phones=("c",),
+  )
+  word4 = WordEntry(
+    graphemes=("y",),
+    phonemes=("a",),
+    phones=("e",),
+  )
+  word5 = WordEntry(
+    graphemes=("z",),
+    phonemes=("d",),
+    phones=("d",),
+  )
+
+  phone_occurrences = OrderedDict({
+    word1: 1,
+    word2: 3,
+    word3: 1,
+    word4: 2,
+    word5: 5,
+  })
+
+  phoneme_occurrences = OrderedDict({
+    (("a",), ("b", "c")): 4,
+    (("x",), ("b", "c")): 2,
+    (("y",), ("a",)): 3,
+    (("z",), ("d",)): 5,
+  })
+
+  res = get_probabilities_df(phone_occurrences, phoneme_occurrences)
+
+  assert list(res.columns) == ["Phonemes", "Phones", "Occurrence", "Total", "Probability"]
+  assert res[["Phonemes", "Phones", "Occurrence", "Total"]].values.tolist() == [
+    ["a", "e", 2, 2],
+    ["b c", "b c", 3, 5],
+    ["b c", "b", 1, 5],
+    ["b c", "c", 1, 5],
+  ]
+  assert res["Probability"].tolist() == [1.0, 0.6, 0.2, 0.2]
+
+
+def test_get_probabilities_df__empty():
+  res = get_probabilities_df(OrderedDict(), OrderedDict())
+
+  assert len(res) == 0
+  assert list(res.columns) == ["Phonemes", "Phones", "Occurrence", "Total", "Probability"]
+
+# endregion
+
 
 def test_probabilities_to_df():
   probabilities = [
@@ -163,6 +229,21 @@ def test_parse_probabilities_df():
   assert res == assert_res
 
 
+def test_parse_probabilities_df__equal_strings_share_symbols():
+  df = DataFrame(
+    data=[
+      ("a b", "a c", 1),
+      ("a c", "a b", 2),
+    ],
+    columns=["Phonemes", "Phones", "Occurrence"],
+  )
+
+  res = parse_probabilities_df(df)
+
+  assert res[("a", "b")][0][0] is list(res.keys())[1]
+  assert res[("a", "c")][0][0] is list(res.keys())[0]
+
+
 def test_replace_with_prob__one_entry():
   symbols = ("a", "b")
 
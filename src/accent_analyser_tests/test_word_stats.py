@@ -1,7 +1,8 @@
 from collections import OrderedDict
 
 from accent_analyser.core.rule_detection import Rule, RuleType, WordEntry
-from accent_analyser.core.word_stats import (get_word_stats, sort_word_stats,
+from accent_analyser.core.word_stats import (get_word_stats, iter_word_stats,
+                                             sort_word_stats,
                                              word_stats_to_df)
 
 
@@ -232,3 +233,27 @@ def test_sort_word_stats_df__sorts_correctly():
   assert resulting_csv_data[1] == (1, "a", "b", "c", "ruleC", 2, 4, "50.00")
   assert resulting_csv_data[2] == (1, "a", "b", "a", "ruleB", 1, 4, "25.00")
   assert resulting_csv_data[3] == (1, "a", "b", "b", "ruleA", 1, 4, "25.00")
+
+
+def test_iter_word_stats__equals_get_word_stats_with_numeric_percentages():
+  word1 = WordEntry(graphemes=("a",), phonemes=("b",), phones=("c",))
+  word2 = WordEntry(graphemes=("a",), phonemes=("b",), phones=("b",))
+  word3 = WordEntry(graphemes=("a",), phonemes=("a",), phones=("d",))
+  rule1 = Rule(rule_type=RuleType.INSERTION, from_symbols=(), to_symbols=("a",))
+  word_rules = OrderedDict({
+    word1: OrderedDict({(0,): rule1}),
+    word2: OrderedDict(),
+    word3: OrderedDict({(1,): rule1}),
+  })
+  phone_occurrences = OrderedDict({word1: 1, word2: 2, word3: 3})
+  phoneme_occurrences = OrderedDict({
+    (word1.graphemes, word1.phonemes): 3,
+    (word3.graphemes, word3.phonemes): 3,
+  })
+
+  res = list(iter_word_stats(word_rules, phone_occurrences, phoneme_occurrences))
+
+  expected = get_word_stats(word_rules, phone_occurrences, phoneme_occurrences)
+  assert [row[:-1] for row in res] == [row[:-1] for row in expected]
+  assert [f"{row[-1]:.2f}" for row in res] == [row[-1] for row in expected]
+  assert res[1][-1] == 2 / 3 * 100